@@ -0,0 +1,90 @@
+import math
+from sqlalchemy import Integer, cast, func, select
+from models import Employee
+
+# Statement builders for the salary analytics endpoints. Everything is aggregated in SQL
+# (GROUP BY / window functions) and filtered on salary_date, which is indexed, so only
+# the result rows leave the database.
+
+
+def _filtered(stmt, date_from=None, date_to=None):
+    if date_from is not None:
+        stmt = stmt.where(Employee.salary_date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Employee.salary_date <= date_to)
+    return stmt
+
+
+def month_expr(dialect):
+    """salary_date truncated to a 'YYYY-MM' string in the dialect's own date functions."""
+    if dialect == "postgresql":
+        return func.to_char(Employee.salary_date, "YYYY-MM")
+    if dialect in ("mysql", "mariadb"):
+        return func.date_format(Employee.salary_date, "%Y-%m")
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m", Employee.salary_date)
+    return func.to_char(Employee.salary_date, "YYYY-MM")
+
+
+def summary_stmt(date_from=None, date_to=None):
+    stmt = select(
+        func.count(Employee.id).label("count"),
+        func.sum(Employee.salary).label("sum"),
+        func.avg(Employee.salary).label("mean"),
+        func.min(Employee.salary).label("min"),
+        func.max(Employee.salary).label("max"),
+    )
+    return _filtered(stmt, date_from, date_to)
+
+
+def monthly_stmt(dialect, date_from=None, date_to=None):
+    month = month_expr(dialect).label("month")
+    stmt = (
+        select(
+            month,
+            func.count(Employee.id).label("count"),
+            func.sum(Employee.salary).label("sum"),
+            func.avg(Employee.salary).label("mean"),
+        )
+        .group_by(month)
+        .order_by(month)
+    )
+    return _filtered(stmt, date_from, date_to)
+
+
+def histogram_stmt(dialect, bucket_width, date_from=None, date_to=None):
+    """Row counts per month and salary bucket of bucket_width, bucket_start = floor(salary / width) * width."""
+    month = month_expr(dialect).label("month")
+    if dialect == "sqlite":
+        # floor() needs SQLite's optional math functions; CAST truncates, which is floor for positive salaries
+        index = cast(Employee.salary / bucket_width, Integer)
+    else:
+        index = func.floor(Employee.salary / bucket_width)  # CAST rounds on PostgreSQL and MySQL
+    bucket = (index * bucket_width).label("bucket_start")
+    stmt = (
+        select(month, bucket, func.count(Employee.id).label("count"))
+        .group_by(month, bucket)
+        .order_by(month, bucket)
+    )
+    return _filtered(stmt, date_from, date_to)
+
+
+def percentile_cont_stmt(percentiles, date_from=None, date_to=None):
+    """PostgreSQL: interpolated percentiles with an ordered-set aggregate."""
+    stmt = select(*(
+        func.percentile_cont(p).within_group(Employee.salary).label(f"p{i}") for i, p in enumerate(percentiles)
+    ))
+    return _filtered(stmt, date_from, date_to)
+
+
+def nearest_rank_stmt(ranks, date_from=None, date_to=None):
+    """Portable percentiles: number rows by salary with a window function and keep the wanted ranks."""
+    ranked = _filtered(
+        select(Employee.salary, func.row_number().over(order_by=Employee.salary).label("rn")),
+        date_from, date_to,
+    ).subquery()
+    return select(ranked.c.rn, ranked.c.salary).where(ranked.c.rn.in_(sorted(set(ranks))))
+
+
+def nearest_ranks(percentiles, count):
+    return [max(1, math.ceil(p * count)) for p in percentiles]
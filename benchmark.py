@@ -0,0 +1,245 @@
+import argparse
+import configparser
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+BENCHMARKS = ["s3_generate", "task1_generate", "csv_to_parquet", "rds_insert"]
+DEFAULT_ROWS = 200_000
+DEFAULT_THRESHOLD = 0.10   # allowed relative drop in rows/s (or growth in peak RSS) against the baseline
+IMPORT_MODULES = ["factory1", "fastapi_rds", "rds_task", "s3_task", "upload_file", "create_config"]
+IMPORT_NOISE_MS = 5.0      # import-time growth below this is not reported as a regression
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Each benchmark runs in a fresh interpreter inside a scratch directory, so imports,
+# caches and peak RSS of one run never leak into the next.
+
+
+# ------------------ Benchmark bodies (run in the child) ------------------
+def _bench_s3_generate(rows, workers):
+    import s3_task
+    s3_task.main(num_rows=rows, num_generators=workers)
+
+def _bench_task1_generate(rows, workers):
+    from task1 import GenerateData
+    generator = GenerateData(total_records=rows, processes=workers)
+    generator.save_data_to_file("bench.csv", generator.iter_employees())
+
+def _setup_csv(rows):
+    # CSV input for the converter, written before the timer starts
+    import numpy as np
+    import pyarrow.csv as pa_csv
+    from faker import Faker
+    from s3_task import EMPLOYEE_SCHEMA, build_name_pools, generate_batch
+    first_names, last_names = build_name_pools(Faker())
+    rng = np.random.default_rng(0)
+    with pa_csv.CSVWriter("bench.csv", EMPLOYEE_SCHEMA) as writer:
+        for start in range(1, rows + 1, 50_000):
+            writer.write_batch(generate_batch(start, min(start + 50_000, rows + 1), rng, first_names, last_names))
+
+def _bench_csv_to_parquet(rows, workers):
+    from convert_to_parquet import CovertToParquet
+    CovertToParquet(use_threads=workers > 1).convert("bench.csv", "bench.parquet")
+
+def _setup_rds(rows):
+    config = configparser.ConfigParser()
+    config["RDS"] = {"url": f"sqlite:///{os.path.abspath('bench.db')}"}
+    from rds_task import RDSTableHandler
+    return RDSTableHandler(config["RDS"])
+
+def _bench_rds_insert(rows, workers, handler):
+    handler.insert_sample_records(rows, workers=workers, progress=False)
+
+
+def _usage():
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own, children
+
+def _reset_peak_rss():
+    """Reset this process's VmHWM to its current RSS (Linux); False where that is not possible."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_since_reset():
+    """VmHWM in bytes from /proc/self/status."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+
+def run_one(name, rows, workers):
+    """
+    Run one benchmark in this process and return its measurements. Peak RSS covers
+    only the timed section: the setup's peak is recorded as setup_rss_mb and, on
+    Linux, VmHWM is reset before the timer starts. Where it cannot be reset
+    (e.g. macOS) peak_rss_mb falls back to ru_maxrss, which includes the setup.
+    """
+    sys.path.insert(0, HERE)
+    setup = {"csv_to_parquet": _setup_csv, "rds_insert": _setup_rds}.get(name)
+    context = setup(rows) if setup else None
+
+    before = _usage()
+    peak_reset = _reset_peak_rss()
+    start = time.perf_counter()
+    if name == "rds_insert":
+        _bench_rds_insert(rows, workers, context)
+    else:
+        globals()[f"_bench_{name}"](rows, workers)
+    wall = time.perf_counter() - start
+    after = _usage()
+
+    result = {"name": name, "rows": rows, "workers": workers, "wall_s": round(wall, 4),
+              "rows_per_s": round(rows / wall, 1), "peak_rss_mb": None, "setup_rss_mb": None,
+              "cpu_s": None, "cpu_util": None}
+    if after is not None:
+        cpu = sum(u.ru_utime + u.ru_stime for u in after) - sum(u.ru_utime + u.ru_stime for u in before)
+        # ru_maxrss is KiB on Linux, bytes on macOS; children report their largest single process,
+        # and none are started during setup
+        scale = 1 if sys.platform == "darwin" else 1024
+        own_peak = _peak_rss_since_reset() if peak_reset else after[0].ru_maxrss * scale
+        peak = max(own_peak, after[1].ru_maxrss * scale)
+        result.update(peak_rss_mb=round(peak / 1e6, 1), setup_rss_mb=round(before[0].ru_maxrss * scale / 1e6, 1),
+                      cpu_s=round(cpu, 3), cpu_util=round(cpu / wall, 2))
+    return result
+
+
+# ------------------ Import time ------------------
+def measure_import(module, repeat=3):
+    """Cumulative import time of module in ms (best of repeat fresh interpreters, -X importtime)."""
+    scratch = tempfile.mkdtemp(prefix="bench_import_")
+    try:
+        with open(os.path.join(scratch, "config.ini"), "w", encoding="utf-8") as f:
+            f.write(f"[RDS]\nurl = sqlite:///{os.path.join(scratch, 'bench.db')}\n")
+        env = {**os.environ, "PYTHONPATH": HERE + os.pathsep + os.environ.get("PYTHONPATH", "")}
+        timings = []
+        for _ in range(repeat):
+            err = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                 cwd=scratch, env=env, capture_output=True, text=True, check=True).stderr
+            # "import time: self [us] | cumulative | imported package"; the module's own line has no indent
+            cumulative = next(int(line.split("|")[1]) for line in err.splitlines()
+                              if line.startswith("import time:") and line.split("|")[2].rstrip() == f" {module}")
+            timings.append(cumulative / 1000)
+        return round(min(timings), 1)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def measure_imports(modules, repeat):
+    imports = {}
+    for module in modules:
+        imports[module] = measure_import(module, repeat)
+        print(f"import {module:<20} {imports[module]:>8.1f} ms")
+    return imports
+
+
+# ------------------ Driver ------------------
+def run_isolated(name, rows, workers):
+    scratch = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    try:
+        out = subprocess.run(
+            [sys.executable, os.path.join(HERE, "benchmark.py"), "--run-one", name, "--rows", str(rows), "--workers", str(workers)],
+            cwd=scratch, capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(out.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def run_suite(names, rows, workers, repeat):
+    results = {}
+    for name in names:
+        runs = [run_isolated(name, rows, workers) for _ in range(repeat)]
+        best = max(runs, key=lambda r: r["rows_per_s"])
+        best["rows_per_s_median"] = statistics.median(r["rows_per_s"] for r in runs)
+        results[name] = best
+        print(f"{name:<16} {best['rows_per_s']:>12,.0f} rows/s  "
+              f"peak RSS {best['peak_rss_mb']} MB (setup {best['setup_rss_mb']} MB)  CPU util {best['cpu_util']}  ({best['wall_s']:.2f} s)")
+    return results
+
+def compare(results, baseline, threshold, imports=None):
+    """Regression messages for results that are slower (or larger) than baseline beyond threshold."""
+    failures = []
+    for module, ms in (imports or {}).items():
+        base = baseline.get("imports", {}).get(module)
+        if base is not None and ms > base * (1 + threshold) and ms - base > IMPORT_NOISE_MS:
+            failures.append(f"import {module}: {ms:.1f} ms vs baseline {base:.1f} ms")
+    for name, result in results.items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base or base["rows"] != result["rows"] or base["workers"] != result["workers"]:
+            continue  # only like-for-like runs are comparable
+        if result["rows_per_s"] < base["rows_per_s"] * (1 - threshold):
+            failures.append(f"{name}: {result['rows_per_s']:,.0f} rows/s vs baseline {base['rows_per_s']:,.0f}")
+        if base.get("peak_rss_mb") and result["peak_rss_mb"] and result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            failures.append(f"{name}: peak RSS {result['peak_rss_mb']} MB vs baseline {base['peak_rss_mb']} MB")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the generation, conversion and load pipelines")
+    parser.add_argument("benchmarks", nargs="*", default=BENCHMARKS, help=f"subset of {', '.join(BENCHMARKS)}")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the best is kept")
+    parser.add_argument("--save", help="write results to this JSON baseline")
+    parser.add_argument("--baseline", help="fail if results regress against this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--imports", nargs="*", metavar="MODULE",
+                        help=f"also time module imports (default: {', '.join(IMPORT_MODULES)})")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.rows, args.workers)))
+        return 0
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    imports = None
+    if args.imports is not None:
+        imports = measure_imports(args.imports or IMPORT_MODULES, args.repeat)
+        if args.benchmarks == BENCHMARKS:
+            args.benchmarks = []  # --imports alone times only the imports
+    results = run_suite(args.benchmarks, args.rows, args.workers, args.repeat)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "env": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "benchmarks": results,
+    }
+    if imports is not None:
+        report["imports"] = imports
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = compare(results, json.load(f), args.threshold, imports)
+        if failures:
+            print("Performance regression:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print(f"No regression beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
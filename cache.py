@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_MAXSIZE = 10_000   # entries kept by the in-process LRU
+CACHE_TTL = 60.0         # seconds an entry stays valid
+# Seconds an invalidated key refuses add(). Covers a read that fetched the row before a
+# write committed and fills the cache after the write invalidated it; such a read that
+# takes longer than this can still cache the old row until the TTL expires.
+INVALIDATE_HOLD = 5.0
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry TTL.
+    get() returns None on a miss; expired entries count as misses and are dropped.
+    invalidate() leaves a short-lived tombstone that makes add() (set-if-absent) a no-op.
+    """
+    _TOMBSTONE = object()
+
+    def __init__(self, maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if value is self._TOMBSTONE:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl or self.ttl)
+
+    def add(self, key, value):
+        """set() unless the key holds a live entry or tombstone; returns whether it was stored."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] >= time.monotonic()):
+                return False
+            self._store(key, value, self.ttl)
+            return True
+
+    def _store(self, key, value, ttl):
+        self._data[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self, key, hold=INVALIDATE_HOLD):
+        """Drop key and keep add() from refilling it for hold seconds."""
+        self.set(key, self._TOMBSTONE, ttl=hold)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "lru",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class RedisCache:
+    """
+    Shared cache on Redis so several API processes see the same entries.
+    Values must be JSON serializable; TTL and eviction are handled by the server.
+    """
+    _TOMBSTONE = b"\x00invalidated"   # not valid JSON, so never a cached value
+    def __init__(self, url, ttl=CACHE_TTL, prefix="emp_steven:"):
+        import redis  # optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        raw = self.client.get(f"{self.prefix}{key}")
+        if raw is None or raw == self._TOMBSTONE:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(f"{self.prefix}{key}", json.dumps(value), ex=int(self.ttl) if self.ttl else None)
+
+    def add(self, key, value):
+        return bool(self.client.set(f"{self.prefix}{key}", json.dumps(value), ex=int(self.ttl) if self.ttl else None, nx=True))
+
+    def delete(self, key):
+        self.client.delete(f"{self.prefix}{key}")
+
+    def invalidate(self, key, hold=INVALIDATE_HOLD):
+        self.client.set(f"{self.prefix}{key}", self._TOMBSTONE, px=int(hold * 1000))
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        info = self.client.info("stats")
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": info.get("evicted_keys"),
+            "expirations": info.get("expired_keys"),
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def make_cache(config):
+    """
+    Build the cache described by a [CACHE] config section:
+    backend = lru | redis | none, maxsize, ttl, redis_url.
+    Returns None when caching is disabled.
+    """
+    backend = config.get("backend", "lru") if config is not None else "lru"
+    ttl = config.getfloat("ttl", CACHE_TTL) if config is not None else CACHE_TTL
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return RedisCache(config["redis_url"], ttl=ttl)
+    maxsize = config.getint("maxsize", CACHE_MAXSIZE) if config is not None else CACHE_MAXSIZE
+    return LRUCache(maxsize=maxsize, ttl=ttl)
@@ -1,5 +1,7 @@
 import configparser
+from functools import lru_cache
 
+@lru_cache(maxsize=None)
 def read_config():
     config = configparser.ConfigParser()
     config.read('config.ini')
@@ -1,15 +1,106 @@
-import pandas as pd
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-   
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from s3_task import EMPLOYEE_SCHEMA
+
+ROW_GROUP_SIZE = 1_000_000        # rows per Parquet row group
+CSV_BLOCK_SIZE = 16 * 1024 * 1024 # bytes of CSV parsed per streamed batch
+
 @dataclass
 class CovertToParquet:
-    def convert(self):
-        df = pd.read_csv('employees1_2025-10-14_19-01-20.csv')
-        df.to_parquet('employee_data1_1.parquet', index=False)
-        print("CSV file has been converted to Parquet format and saved as 'employee_data1.parquet'")
+    """
+    Streams a CSV into Parquet batch by batch with pyarrow.csv.open_csv, so memory is
+    bounded by one row group (plus one CSV block) whatever the input size.
+    """
+    row_group_size: int = ROW_GROUP_SIZE
+    compression: str = "snappy"
+    compression_level: int | None = None
+    dictionary_name: bool = True      # dictionary-encode the repetitive name column
+    block_size: int = CSV_BLOCK_SIZE
+    use_threads: bool = True          # multi-threaded CSV parsing
 
+    def convert(self, src, dst=None):
+        start_time = time.time()
+        dst = dst or os.path.splitext(src)[0] + ".parquet"
+
+        reader = pa_csv.open_csv(
+            src,
+            read_options=pa_csv.ReadOptions(block_size=self.block_size, use_threads=self.use_threads),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=EMPLOYEE_SCHEMA,
+                include_columns=EMPLOYEE_SCHEMA.names,
+            ),
+        )
+        rows = 0
+        with pq.ParquetWriter(
+            dst,
+            reader.schema,
+            compression=self.compression,
+            compression_level=self.compression_level,
+            use_dictionary=["name"] if self.dictionary_name else False,
+        ) as writer:
+            # gather streamed batches into full row groups before writing
+            pending, pending_rows = [], 0
+            for batch in reader:
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                if pending_rows >= self.row_group_size:
+                    table = pa.Table.from_batches(pending)
+                    full = (pending_rows // self.row_group_size) * self.row_group_size
+                    writer.write_table(table.slice(0, full), row_group_size=self.row_group_size)
+                    rest = table.slice(full)
+                    pending, pending_rows = rest.to_batches(), rest.num_rows
+                    rows += full
+            if pending_rows:
+                writer.write_table(pa.Table.from_batches(pending, schema=reader.schema), row_group_size=self.row_group_size)
+                rows += pending_rows
+
+        elapsed = time.time() - start_time
+        size_mb = os.path.getsize(src) / 1e6
+        print(f"CSV file '{src}' has been converted to Parquet format and saved as '{dst}' "
+              f"({rows:,} rows, {size_mb / elapsed:,.0f} MB/s)")
+        return dst
 
-if __name__ == "__main__":
-    converter = CovertToParquet()
-    converter.convert()
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert employee CSV files to Parquet")
+    parser.add_argument("inputs", nargs="+", help="CSV files to convert")
+    parser.add_argument("-o", "--output-dir", help="write .parquet files here instead of next to the inputs")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="files converted in parallel")
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE)
+    parser.add_argument("--compression", default="snappy", help="snappy, zstd, gzip, lz4, brotli or none")
+    parser.add_argument("--compression-level", type=int)
+    parser.add_argument("--no-dictionary", action="store_true", help="plain-encode the name column")
+    parser.add_argument("--single-threaded", action="store_true", help="parse each CSV on one thread")
+    args = parser.parse_args(argv)
+
+    converter = CovertToParquet(
+        row_group_size=args.row_group_size,
+        compression=args.compression,
+        compression_level=args.compression_level,
+        dictionary_name=not args.no_dictionary,
+        use_threads=not args.single_threaded,
+    )
+    outputs = [
+        os.path.join(args.output_dir, os.path.splitext(os.path.basename(src))[0] + ".parquet") if args.output_dir else None
+        for src in args.inputs
+    ]
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = max(1, min(args.jobs, len(args.inputs)))
+    if jobs == 1:
+        for src, dst in zip(args.inputs, outputs):
+            converter.convert(src, dst)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(converter.convert, args.inputs, outputs))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
-import pyarrow.parquet as pq
-table = pq.read_table(r"C:\Users\ZML-WIN-StevenD-01\Desktop\Project1_1\employees1.parquet")
-print("Total rows in Parquet:", table.num_rows)
+import sys
+from inspect_parquet import inspect_sources
+
+# Row count from Parquet footers only; see inspect_parquet.py for the full report.
+report = inspect_sources(sys.argv[1:] or ["."])
+print("Total rows in Parquet:", report["rows"])
@@ -23,12 +23,17 @@
 #     create_config()
 
 import configparser
-from cryptography.fernet import Fernet
 import getpass  # for hidden input
+from functools import lru_cache
+
+CONFIG_FILE = "config.ini"
+ENCRYPTED_S3_KEYS = ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY")
 
 # -------------------- Encryption Helper --------------------
+# cryptography is imported on first use, so only callers that encrypt or decrypt pay for it
 def generate_key():
     """Generate a Fernet key and save it to a file."""
+    from cryptography.fernet import Fernet
     key = Fernet.generate_key()
     with open("secret.key", "wb") as f:
         f.write(key)
@@ -39,10 +44,12 @@ def load_key():
     return open("secret.key", "rb").read()
 
 def encrypt_value(value, key):
+    from cryptography.fernet import Fernet
     f = Fernet(key)
     return f.encrypt(value.encode()).decode()
 
 def decrypt_value(enc_value, key):
+    from cryptography.fernet import Fernet
     f = Fernet(key)
     return f.decrypt(enc_value.encode()).decode()
 
@@ -81,21 +88,35 @@ def create_config():
 
 
     # Write config to file
-    with open('config.ini', 'w') as f:
+    with open(CONFIG_FILE, 'w') as f:
         config.write(f)
+    load_config.cache_clear()
+    read_config.cache_clear()
 
     print("Config file created successfully!")
 
 # -------------------- Read Config --------------------
-def read_config():
-    key = load_key()
+# Both readers parse config.ini once per process and return the same object on later
+# calls; treat it as read-only. create_config() clears the caches after rewriting the file.
+@lru_cache(maxsize=None)
+def load_config(path=CONFIG_FILE):
+    """Parse the config file as is, without decrypting anything."""
     config = configparser.ConfigParser()
-    config.read("config.ini")
+    config.read(path)
+    return config
+
+@lru_cache(maxsize=None)
+def read_config(path=CONFIG_FILE):
+    """Parse the config file and decrypt the S3 credentials (loads secret.key only if needed)."""
+    config = configparser.ConfigParser()
+    config.read(path)
 
     # Decrypt sensitive fields
-    if 'S3' in config:
-        config['S3']['AWS_ACCESS_KEY_ID'] = decrypt_value(config['S3']['AWS_ACCESS_KEY_ID'], key)
-        config['S3']['AWS_SECRET_ACCESS_KEY'] = decrypt_value(config['S3zmx-training-bucketbatch2025']['AWS_SECRET_ACCESS_KEY'], key)
+    if 'S3' in config and any(name in config['S3'] for name in ENCRYPTED_S3_KEYS):
+        key = load_key()
+        for name in ENCRYPTED_S3_KEYS:
+            if name in config['S3']:
+                config['S3'][name] = decrypt_value(config['S3'][name], key)
 
     return config
 
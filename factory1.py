@@ -1,7 +1,6 @@
-import configparser
-from rds_task import RDSImporter  # RDS logic
-from s3_task import main as s3_main  # use s3_task for data generation & upload
-from upload_file import main as s3_upload_main, FileUpload
+from create_config import load_config
+# Backends (rds_task, parquet_loader, s3_task, upload_file) are imported in the branch that
+# uses them, so the CLI does not load SQLAlchemy, boto3, pyarrow and faker up front.
 # ------------------ Abstract Base ------------------
 from abc import ABC, abstractmethod
 
@@ -18,9 +17,18 @@ class ImporterFactory:
             # For S3, we just call the s3_task main function
             return S3Wrapper(config)
         elif import_type == "RDS":
+            from rds_task import RDSImporter  # RDS logic
             return RDSImporter(config)
+        elif import_type == "PARQUET":
+            # loads Parquet files into the RDS table, so it takes the [RDS] section
+            from parquet_loader import ParquetImporter  # existing Parquet output -> RDS
+            return ParquetImporter(config)
+        elif import_type == "PIPELINE":
+            # generate -> Parquet -> S3 and -> RDS concurrently; takes the whole config
+            from pipeline import PipelineImporter
+            return PipelineImporter(config)
         else:
-            raise ValueError("Invalid import_type. Use 'S3' or 'RDS'.")
+            raise ValueError("Invalid import_type. Use 'S3', 'RDS', 'PARQUET' or 'PIPELINE'.")
 
 # ------------------ S3 Wrapper ------------------
 class S3Wrapper(DataImporter):
@@ -30,9 +38,21 @@ class S3Wrapper(DataImporter):
     def __init__(self, config):
         self.config = config
         self.bucket_name = config['bucket_name']
+        # stream_upload = true sends Parquet row groups to S3 while they are generated
+        self.stream_upload = config.getboolean('stream_upload', fallback=False)
 
     def import_data(self, file_path=None):
+        from s3_task import main as s3_main, OUTPUT_PARQUET  # use s3_task for data generation & upload
+        from upload_file import FileUpload
         # If file_path is provided, you can modify s3_task to accept it
+        if self.stream_upload:
+            uploader = FileUpload(self.bucket_name)
+            s3_key = uploader.build_s3_key(OUTPUT_PARQUET)
+            print("Generating data and streaming Parquet to S3 via s3_task.py ...")
+            s3_uri = s3_main(s3_target=(self.bucket_name, s3_key))
+            print(f"Parquet streamed to {s3_uri}")
+            return
+
         print("Generating and uploading data to S3 via s3_task.py ...")
         parquet_file= s3_main()  # currently your s3_task generates 1M rows and outputs CSV & Parquet
         print(f"Uploading generated Parquet to S3: {parquet_file}")
@@ -41,23 +61,28 @@ class S3Wrapper(DataImporter):
 
 # ------------------ Main ------------------
 def main():
-    config = configparser.ConfigParser()
-    config.read("config.ini")
+    config = load_config()
 
-    import_type = input("Enter import type (S3/RDS): ").strip()
+    import_type = input("Enter import type (S3/RDS/PARQUET/PIPELINE): ").strip()
 
-    if import_type not in ["S3", "RDS"]:
-        print("Invalid import type. Choose S3 or RDS.")
+    if import_type not in ["S3", "RDS", "PARQUET", "PIPELINE"]:
+        print("Invalid import type. Choose S3, RDS, PARQUET or PIPELINE.")
         return
 
-    conf_section = config[import_type]
+    if import_type == "PIPELINE":
+        conf_section = config
+    else:
+        conf_section = config["RDS" if import_type == "PARQUET" else import_type]
     importer = ImporterFactory.get_importer(import_type, conf_section)
-    importer.import_data()
+    if import_type == "PARQUET":
+        source = input("Enter Parquet file, directory or s3:// prefix: ").strip()
+        importer.import_data(source)
+    else:
+        importer.import_data()
 
-    if import_type == "RDS":
-        # optional: view all records
-        employees = importer.handler.get_all()
-        print(f"Total records in RDS DB: {len(employees)}")
+    if import_type in ("RDS", "PARQUET"):
+        # optional: table size from statistics, without loading the rows
+        print(f"Total records in RDS DB (approx.): {importer.handler.approximate_count():,}")
 
 
 if __name__ == "__main__":
@@ -1,23 +1,61 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import Annotated, List, Literal
 from rds_task import RDSTableHandler
-import configparser
-from datetime import date
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-from models import Employee
+from cache import make_cache
+import analytics
+import base64
+import binascii
+import json
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from functools import lru_cache
+from create_config import load_config
+from sqlalchemy import delete, func, insert, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Employee, lower_name
+
+PAGE_SIZE_MAX = 1000       # largest page GET /items will return
+STREAM_BATCH_ROWS = 5000   # rows fetched per server-side cursor round trip when streaming
+
+@lru_cache(maxsize=None)
+def item_schema():
+    # pyarrow is only loaded once a client asks for Arrow output
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("salary", pa.float64()),
+        ("salary_date", pa.date32()),
+    ])
 
 # ------------------ Load RDS config ------------------
-config = configparser.ConfigParser()
-config.read("config.ini")
+config = load_config()
 rds_config = config["RDS"]
+BULK_MAX_ITEMS = config.getint("API", "bulk_max_items", fallback=1000)  # largest array a bulk endpoint accepts
 
-# Initialize table handler
+# Initialize table handler; requests go through its async engine and pool ([RDS] pool_* keys)
 handler = RDSTableHandler(rds_config)
 
+# Read-through cache for GET /items/{emp_id}; configured by an optional [CACHE] section
+item_cache = make_cache(config["CACHE"] if config.has_section("CACHE") else None)
+
 # ------------------ FastAPI app ------------------
-app = FastAPI(title="RDS Employee CRUD API")
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await handler.async_engine.dispose()
+
+app = FastAPI(title="RDS Employee CRUD API", lifespan=lifespan)
+
+# ------------------ Session dependency ------------------
+async def get_session():
+    """One pooled AsyncSession per request, always returned to the pool (rolled back if uncommitted)."""
+    async with handler.AsyncSession() as session:
+        yield session
+
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 # ------------------ Pydantic models ------------------
 class EmployeeCreate(BaseModel):
@@ -39,46 +77,328 @@ class EmployeeOut(BaseModel):
     class Config:
         orm_mode = True
 
+class EmployeePage(BaseModel):
+    items: List[EmployeeOut]
+    next_cursor: str | None = None
+
+class EmployeeBulkUpdate(EmployeeUpdate):
+    id: int
+
+class EmployeeBulkDelete(BaseModel):
+    ids: List[int]
+
+class BulkItemResult(BaseModel):
+    id: int | None
+    status: Literal["created", "updated", "unchanged", "deleted", "not_found"]
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+
+class SalarySummary(BaseModel):
+    count: int
+    sum: float | None
+    mean: float | None
+    min: float | None
+    max: float | None
+
+class SalaryPercentiles(BaseModel):
+    method: Literal["continuous", "nearest_rank"]
+    count: int | None = None
+    values: dict[str, float | None]
+
+class MonthlySalary(BaseModel):
+    month: str
+    count: int
+    sum: float
+    mean: float
+
+class HistogramBucket(BaseModel):
+    month: str
+    bucket_start: float
+    count: int
+
+# ------------------ Keyset cursors ------------------
+# A cursor is the sort key of the last row on a page, JSON encoded and base64'd so
+# clients treat it as opaque. The next page starts strictly after that key.
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor, *types):
+    """The cursor's values, checked to be one value of each of types (400 otherwise)."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types) or not all(
+        isinstance(value, kind) and not isinstance(value, bool) for value, kind in zip(values, types)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
 # ------------------ CRUD Endpoints ------------------
 
-@app.get("/items", response_model=List[EmployeeOut])
-def get_all_items(limit=10, offset=0):
-   
-    session: Session = handler.Session()
-    stmt = select(Employee).limit(limit)
-    employees = session.execute(stmt).scalars().all()
-    return employees
+@app.get("/items", response_model=EmployeePage)
+async def get_all_items(session: SessionDep, limit: int = Query(10, ge=1, le=PAGE_SIZE_MAX), cursor: str | None = None):
+    stmt = select(Employee).order_by(Employee.id).limit(limit + 1)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        stmt = stmt.where(Employee.id > last_id)
+
+    employees = (await session.execute(stmt)).scalars().all()
+
+    next_cursor = None
+    if len(employees) > limit:  # fetched one extra row to know whether another page exists
+        employees = employees[:limit]
+        next_cursor = encode_cursor(employees[-1].id)
+    return {"items": employees, "next_cursor": next_cursor}
+
+
+async def _stream_items(fmt, after_id, batch_rows):
+    """Walk emp_steven in id order through a server-side cursor, one encoded page per partition."""
+    stmt = (
+        select(Employee.id, Employee.name, Employee.salary, Employee.salary_date)
+        .order_by(Employee.id)
+        .execution_options(yield_per=batch_rows)
+    )
+    if after_id is not None:
+        stmt = stmt.where(Employee.id > after_id)
+
+    # own session: request dependencies are torn down before the response body is sent
+    async with handler.AsyncSession() as session:
+        result = await session.stream(stmt)
+        if fmt == "arrow":
+            import pyarrow as pa
+            schema = item_schema()
+            yield schema.serialize().to_pybytes()
+        async for rows in result.partitions():
+            if fmt == "ndjson":
+                yield "".join(
+                    json.dumps({"id": r.id, "name": r.name, "salary": r.salary, "salary_date": r.salary_date.isoformat() if r.salary_date else None}) + "\n"
+                    for r in rows
+                )
+            else:
+                columns = list(zip(*rows))
+                batch = pa.RecordBatch.from_arrays(
+                    [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                    schema=schema,
+                )
+                yield batch.serialize().to_pybytes()
+        if fmt == "arrow":
+            yield b"\xff\xff\xff\xff\x00\x00\x00\x00"  # IPC end-of-stream marker
+
+
+def _prefix_range(prefix):
+    # [prefix, upper) bounds the btree range scan on lower_name (code point order); LIKE then
+    # filters exactly. upper is None when no string is above every match (all U+10FFFF).
+    stem = prefix.rstrip("\U0010ffff")
+    upper = None
+    if stem:
+        following = ord(stem[-1]) + 1
+        if 0xD800 <= following <= 0xDFFF:
+            following = 0xE000  # skip surrogates, which cannot be encoded
+        upper = stem[:-1] + chr(following)
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return upper, escaped + "%"
+
+
+@app.get("/items/search", response_model=EmployeePage)
+async def search_items(
+    session: SessionDep,
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: Literal["prefix", "exact", "fuzzy"] = "prefix",
+    limit: int = Query(10, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = None,
+):
+    """
+    Case-insensitive name search. prefix/exact walk the (lower_name, id) index;
+    fuzzy ranks by trigram similarity (PostgreSQL with pg_trgm only).
+    """
+    term = q.lower()
+    name_key = lower_name(Employee.name)
+
+    if mode == "fuzzy":
+        if not handler.supports_fuzzy_search:
+            raise HTTPException(status_code=400, detail="Fuzzy search needs PostgreSQL with pg_trgm (python rds_task.py migrate)")
+        score = func.similarity(Employee.name, q)
+        stmt = select(Employee, score).where(Employee.name.op("%")(q)).order_by(score.desc(), Employee.id)
+        if cursor:
+            last_score, last_id = decode_cursor(cursor, (int, float), int)
+            stmt = stmt.where((score < last_score) | ((score == last_score) & (Employee.id > last_id)))
+        rows = (await session.execute(stmt.limit(limit + 1))).all()
+        employees = [emp for emp, _ in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0].id) if len(rows) > limit else None
+        return {"items": employees, "next_cursor": next_cursor}
+
+    stmt = select(Employee, name_key).order_by(name_key, Employee.id)
+    if mode == "exact":
+        stmt = stmt.where(name_key == term)
+    else:
+        upper, pattern = _prefix_range(term)
+        stmt = stmt.where(name_key >= term, name_key.like(pattern, escape="\\"))
+        if upper is not None:
+            stmt = stmt.where(name_key < upper)
+    if cursor:
+        last_name, last_id = decode_cursor(cursor, str, int)
+        stmt = stmt.where(tuple_(name_key, Employee.id) > tuple_(last_name, last_id))
+
+    rows = (await session.execute(stmt.limit(limit + 1))).all()
+    employees = [emp for emp, _ in rows[:limit]]
+    # cursor keeps the database's lower(name) so the next page compares like with like
+    next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0].id) if len(rows) > limit else None
+    return {"items": employees, "next_cursor": next_cursor}
 
 
+@app.get("/items/stream")
+async def stream_items(
+    format: Literal["ndjson", "arrow"] = "ndjson",
+    after_id: int | None = None,
+    batch_rows: int = Query(STREAM_BATCH_ROWS, ge=1, le=100_000),
+):
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/vnd.apache.arrow.stream"
+    return StreamingResponse(_stream_items(format, after_id, batch_rows), media_type=media_type)
+
+
+def _cache_entry(emp):
+    # plain JSON-friendly dict so every cache backend can hold it
+    return {"id": emp.id, "name": emp.name, "salary": emp.salary, "salary_date": emp.salary_date.isoformat()}
+
+def _cache_set(emp):
+    if item_cache is not None:
+        item_cache.set(emp.id, _cache_entry(emp))
+
+def _cache_fill(emp):
+    # after a read: set-if-absent, so a row read before a concurrent write committed
+    # cannot replace that write's invalidation tombstone
+    if item_cache is not None:
+        item_cache.add(emp.id, _cache_entry(emp))
+
+def _cache_invalidate(emp_id):
+    # called after commit
+    if item_cache is not None:
+        item_cache.invalidate(emp_id)
+
+# ------------------ Bulk Endpoints ------------------
+# Each call is one transaction with one set-based statement per operation.
+# Declared before the /items/{emp_id} routes so "bulk" is not parsed as an id.
+
+def _check_bulk_size(n):
+    if n > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per bulk request")
+
+def _check_unique(ids):
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=422, detail="Duplicate ids in bulk request")
+
+async def _existing_ids(session, ids):
+    return set((await session.scalars(select(Employee.id).where(Employee.id.in_(ids)))).all())
+
+@app.post("/items/bulk", response_model=BulkResult)
+async def create_items_bulk(items: List[EmployeeCreate], session: SessionDep):
+    _check_bulk_size(len(items))
+    if not items:
+        return {"results": []}
+    rows = [dict(item) for item in items]
+
+    dialect = session.bind.dialect  # the async driver's, which may differ from handler.engine's
+    if dialect.insert_executemany_returning:
+        # multi-row INSERT ... RETURNING, ids come back in input order
+        stmt = insert(Employee).returning(Employee.id, sort_by_parameter_order=True)
+        ids = (await session.scalars(stmt, rows)).all()
+    elif dialect.name in ("mysql", "mariadb"):
+        # no RETURNING: one multi-row INSERT is a "simple insert", for which InnoDB reserves
+        # consecutive ids in input order, starting at LAST_INSERT_ID() on this connection
+        result = await session.execute(insert(Employee).values(rows))
+        first, step = (await session.execute(text("SELECT LAST_INSERT_ID(), @@auto_increment_increment"))).one()
+        ids = [first + i * step for i in range(result.rowcount)]
+    else:
+        # no way to learn the ids on other dialects without RETURNING: rows are created, ids are null
+        await session.execute(insert(Employee), rows)
+        ids = [None] * len(rows)
+    await session.commit()
+
+    for emp_id, row in zip(ids, rows):
+        if emp_id is not None:
+            _cache_set(Employee(id=emp_id, **row))
+    return {"results": [{"id": emp_id, "status": "created"} for emp_id in ids]}
+
+@app.patch("/items/bulk", response_model=BulkResult)
+async def update_items_bulk(items: List[EmployeeBulkUpdate], session: SessionDep):
+    _check_bulk_size(len(items))
+    ids = [item.id for item in items]
+    _check_unique(ids)
+    if not items:
+        return {"results": []}
+
+    existing = await _existing_ids(session, ids)
+    params = []
+    updated_at = datetime.utcnow()  # one timestamp for the whole request
+    for item in items:
+        changes = {key: value for key, value in dict(item).items() if key != "id" and value is not None}
+        if item.id in existing and changes:
+            params.append({"id": item.id, **changes, "updated_at": updated_at})
+    if params:
+        # ORM bulk UPDATE by primary key: one executemany per distinct set of changed columns
+        await session.execute(update(Employee), params)
+    await session.commit()
+
+    updated = {row["id"] for row in params}
+    for emp_id in updated:
+        _cache_invalidate(emp_id)
+    return {"results": [
+        {"id": emp_id, "status": "updated" if emp_id in updated else "unchanged" if emp_id in existing else "not_found"}
+        for emp_id in ids
+    ]}
+
+@app.delete("/items/bulk", response_model=BulkResult)
+async def delete_items_bulk(body: EmployeeBulkDelete, session: SessionDep):
+    _check_bulk_size(len(body.ids))
+    _check_unique(body.ids)
+    if not body.ids:
+        return {"results": []}
+
+    existing = await _existing_ids(session, body.ids)
+    if existing:
+        stmt = delete(Employee).where(Employee.id.in_(existing)).execution_options(synchronize_session=False)
+        await session.execute(stmt)
+    await session.commit()
+
+    for emp_id in existing:
+        _cache_invalidate(emp_id)
+    return {"results": [
+        {"id": emp_id, "status": "deleted" if emp_id in existing else "not_found"} for emp_id in body.ids
+    ]}
+
+# ------------------ Single-item Endpoints ------------------
+
 @app.get("/items/{emp_id}", response_model=EmployeeOut)
-def get_item(emp_id: int):
-    session = handler.Session()
-    emp = session.query(handler.Employee).get(emp_id)
-    session.close()
+async def get_item(emp_id: int, session: SessionDep):
+    if item_cache is not None:
+        cached = item_cache.get(emp_id)
+        if cached is not None:
+            return cached  # the session never checks out a connection on a hit
+
+    emp = await session.get(Employee, emp_id)
     if not emp:
         raise HTTPException(status_code=404, detail="Employee not found")
+    _cache_fill(emp)
     return emp
 
 @app.post("/items", response_model=EmployeeOut)
-def create_item(emp_data: EmployeeCreate):
-    session = handler.Session()
-    new_emp = handler.Employee(
+async def create_item(emp_data: EmployeeCreate, session: SessionDep):
+    new_emp = Employee(
         name=emp_data.name,
         salary=emp_data.salary,
         salary_date=emp_data.salary_date
     )
     session.add(new_emp)
-    session.commit()
-    session.refresh(new_emp)
-    session.close()
+    await session.commit()
+    _cache_set(new_emp)
     return new_emp
 
 @app.put("/items/{emp_id}", response_model=EmployeeOut)
-def update_item(emp_id: int, emp_data: EmployeeUpdate):
-    session = handler.Session()
-    emp = session.query(handler.Employee).get(emp_id)
+async def update_item(emp_id: int, emp_data: EmployeeUpdate, session: SessionDep):
+    emp = await session.get(Employee, emp_id)
     if not emp:
-        session.close()
         raise HTTPException(status_code=404, detail="Employee not found")
     
     if emp_data.name is not None:
@@ -88,20 +408,73 @@ def update_item(emp_id: int, emp_data: EmployeeUpdate):
     if emp_data.salary_date is not None:
         emp.salary_date = emp_data.salary_date
 
-    session.commit()
-    session.refresh(emp)
-    session.close()
+    await session.commit()
+    _cache_invalidate(emp_id)
     return emp
 
 @app.delete("/items/{emp_id}")
-def delete_item(emp_id: int):
-    session = handler.Session()
-    emp = session.query(handler.Employee).get(emp_id)
+async def delete_item(emp_id: int, session: SessionDep):
+    emp = await session.get(Employee, emp_id)
     if not emp:
-        session.close()
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    session.delete(emp)
-    session.commit()
-    session.close()
+    await session.delete(emp)
+    await session.commit()
+    _cache_invalidate(emp_id)
     return {"detail": f"Employee {emp_id} deleted successfully"}
+
+# ------------------ Analytics ------------------
+# Aggregated in SQL (see analytics.py); salary_date range filters are inclusive.
+
+@app.get("/analytics/summary", response_model=SalarySummary)
+async def salary_summary(session: SessionDep, date_from: date | None = None, date_to: date | None = None):
+    row = (await session.execute(analytics.summary_stmt(date_from, date_to))).one()
+    return row._asdict()
+
+@app.get("/analytics/percentiles", response_model=SalaryPercentiles)
+async def salary_percentiles(
+    session: SessionDep,
+    p: List[float] = Query([0.5, 0.9, 0.99]),
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    if any(not 0 <= q <= 1 for q in p):
+        raise HTTPException(status_code=422, detail="Percentiles must be between 0 and 1")
+
+    if handler.engine.dialect.name == "postgresql":
+        row = (await session.execute(analytics.percentile_cont_stmt(p, date_from, date_to))).one()
+        return {"method": "continuous", "values": {str(q): value for q, value in zip(p, row)}}
+
+    count = (await session.execute(analytics.summary_stmt(date_from, date_to))).one().count
+    if count == 0:
+        return {"method": "nearest_rank", "count": 0, "values": {str(q): None for q in p}}
+    ranks = analytics.nearest_ranks(p, count)
+    by_rank = dict((await session.execute(analytics.nearest_rank_stmt(ranks, date_from, date_to))).all())
+    return {"method": "nearest_rank", "count": count, "values": {str(q): by_rank.get(r) for q, r in zip(p, ranks)}}
+
+@app.get("/analytics/monthly", response_model=List[MonthlySalary])
+async def salary_monthly(session: SessionDep, date_from: date | None = None, date_to: date | None = None):
+    stmt = analytics.monthly_stmt(handler.engine.dialect.name, date_from, date_to)
+    return [row._asdict() for row in await session.execute(stmt)]
+
+@app.get("/analytics/histogram", response_model=List[HistogramBucket])
+async def salary_histogram(
+    session: SessionDep,
+    bucket_width: float = Query(10_000, gt=0),
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    stmt = analytics.histogram_stmt(handler.engine.dialect.name, bucket_width, date_from, date_to)
+    return [row._asdict() for row in await session.execute(stmt)]
+
+# ------------------ Stats ------------------
+
+@app.get("/stats/pool")
+def get_pool_stats():
+    return handler.pool_status()
+
+@app.get("/stats/cache")
+def get_cache_stats():
+    if item_cache is None:
+        return {"backend": "none"}
+    return item_cache.stats()
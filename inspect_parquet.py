@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+FOOTER_CACHE_FILE = ".parquet_footer_cache.json"
+INSPECT_WORKERS = 32   # footers read concurrently (I/O bound, mostly S3 latency)
+
+
+def list_parquet_files(source):
+    """(filesystem, [FileInfo]) for a local file/directory or an s3://bucket/prefix."""
+    if "://" in source:
+        fs, path = pafs.FileSystem.from_uri(source)
+    else:
+        fs = pafs.LocalFileSystem()
+        path = fs.normalize_path(os.path.abspath(source))
+
+    info = fs.get_file_info(path)
+    if info.type == pafs.FileType.File:
+        return fs, [info]
+    if info.type == pafs.FileType.NotFound and "://" not in source:
+        raise FileNotFoundError(source)
+    # directory or S3 prefix; dataset summaries (_metadata) are not data files
+    selector = pafs.FileSelector(path, recursive=True, allow_not_found=True)
+    files = [
+        f for f in fs.get_file_info(selector)
+        if f.type == pafs.FileType.File and f.path.endswith(".parquet")
+    ]
+    return fs, sorted(files, key=lambda f: f.path)
+
+
+def _json_value(value):
+    return value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+
+
+def summarize_footer(fs, path):
+    """Everything the report needs, read from the Parquet footer alone (no data pages)."""
+    with fs.open_input_file(path) as f:
+        metadata = pq.ParquetFile(f).metadata
+
+    columns = {}
+    row_groups = []
+    for i in range(metadata.num_row_groups):
+        rg = metadata.row_group(i)
+        row_groups.append({"rows": rg.num_rows, "bytes": rg.total_byte_size})
+        for j in range(rg.num_columns):
+            chunk = rg.column(j)
+            col = columns.setdefault(chunk.path_in_schema, {
+                "compression": chunk.compression, "compressed": 0, "uncompressed": 0, "min": None, "max": None,
+            })
+            col["compressed"] += chunk.total_compressed_size
+            col["uncompressed"] += chunk.total_uncompressed_size
+            stats = chunk.statistics
+            if stats is not None and stats.has_min_max:
+                col["min"] = stats.min if col["min"] is None else min(col["min"], stats.min)
+                col["max"] = stats.max if col["max"] is None else max(col["max"], stats.max)
+
+    for col in columns.values():
+        col["min"], col["max"] = _json_value(col["min"]), _json_value(col["max"])
+    return {
+        "rows": metadata.num_rows,
+        "row_groups": row_groups,
+        "columns": columns,
+        "created_by": metadata.created_by,
+    }
+
+
+class FooterCache:
+    """Footer summaries keyed by path, valid while the file's size and mtime are unchanged."""
+    def __init__(self, path=FOOTER_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    @staticmethod
+    def _stamp(info):
+        return [info.size, info.mtime_ns]
+
+    def get(self, info):
+        entry = self._entries.get(info.path)
+        if entry and entry["stamp"] == self._stamp(info):
+            return entry["summary"]
+        return None
+
+    def set(self, info, summary):
+        with self._lock:
+            self._entries[info.path] = {"stamp": self._stamp(info), "summary": summary}
+            self._dirty = True
+
+    def save(self):
+        if self.path and self._dirty:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+
+
+def inspect_sources(sources, workers=INSPECT_WORKERS, cache_path=FOOTER_CACHE_FILE):
+    """Footer summaries for every Parquet file under sources plus dataset-wide totals."""
+    cache = FooterCache(cache_path)
+    files = {}
+    hits = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for source in sources:
+            fs, infos = list_parquet_files(source)
+            for info in infos:
+                cached = cache.get(info)
+                if cached is not None:
+                    files[info.path] = cached
+                    hits += 1
+                else:
+                    pending[info.path] = (info, pool.submit(summarize_footer, fs, info.path))
+        for path, (info, future) in pending.items():
+            files[path] = future.result()
+            cache.set(info, files[path])
+    cache.save()
+
+    columns = {}
+    for summary in files.values():
+        for name, col in summary["columns"].items():
+            total = columns.setdefault(name, {"compressed": 0, "uncompressed": 0, "min": None, "max": None})
+            total["compressed"] += col["compressed"]
+            total["uncompressed"] += col["uncompressed"]
+            for key, pick in (("min", min), ("max", max)):
+                if col[key] is not None:
+                    total[key] = col[key] if total[key] is None else pick(total[key], col[key])
+    for col in columns.values():
+        col["ratio"] = round(col["uncompressed"] / col["compressed"], 2) if col["compressed"] else None
+
+    return {
+        "files": files,
+        "rows": sum(s["rows"] for s in files.values()),
+        "row_groups": sum(len(s["row_groups"]) for s in files.values()),
+        "compressed_bytes": sum(c["compressed"] for c in columns.values()),
+        "columns": columns,
+        "cache_hits": hits,
+    }
+
+
+def print_report(report, per_file=False):
+    if per_file:
+        for path, summary in report["files"].items():
+            sizes = [rg["rows"] for rg in summary["row_groups"]]
+            print(f"{path}: {summary['rows']:,} rows in {len(sizes)} row group(s) {sizes}")
+    print(f"Files: {len(report['files']):,} ({report['cache_hits']:,} from cache)")
+    print(f"Total rows in Parquet: {report['rows']:,}")
+    print(f"Row groups: {report['row_groups']:,}, compressed size: {report['compressed_bytes'] / 1e6:,.1f} MB")
+    print(f"{'column':<14}{'compressed MB':>15}{'ratio':>8}  min .. max")
+    for name, col in report["columns"].items():
+        print(f"{name:<14}{col['compressed'] / 1e6:>15,.2f}{col['ratio'] or 0:>8}  {col['min']} .. {col['max']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect Parquet files from their footers only")
+    parser.add_argument("sources", nargs="+", help="Parquet files, directories or s3://bucket/prefix")
+    parser.add_argument("-j", "--workers", type=int, default=INSPECT_WORKERS)
+    parser.add_argument("--files", action="store_true", help="list every file and its row groups")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    parser.add_argument("--no-cache", action="store_true", help=f"ignore and do not update {FOOTER_CACHE_FILE}")
+    args = parser.parse_args(argv)
+
+    start_time = time.time()
+    report = inspect_sources(args.sources, workers=args.workers, cache_path=None if args.no_cache else FOOTER_CACHE_FILE)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, per_file=args.files)
+        print(f"Inspected in {time.time() - start_time:.3f} seconds.")
+
+
+if __name__ == "__main__":
+    main()
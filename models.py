@@ -1,12 +1,71 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Index
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.sql.expression import FunctionElement
 
 Base = declarative_base()
 
+
+class utcnow(FunctionElement):
+    """Current UTC time on the database, the server-side counterpart of datetime.utcnow."""
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow)
+def _utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"  # already UTC on SQLite
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "timezone('utc', CURRENT_TIMESTAMP)"  # CURRENT_TIMESTAMP alone is session-local
+
+@compiles(utcnow, "mysql")
+@compiles(utcnow, "mariadb")
+def _utcnow_mysql(element, compiler, **kw):
+    return "UTC_TIMESTAMP()"
+
+
+class lower_name(FunctionElement):
+    """
+    lower(name) ordered by code point (COLLATE "C" on PostgreSQL, whose default collations
+    do not order strings by code point), so [q, next(q)) holds exactly the keys starting
+    with q. SQLite's default BINARY collation already compares code points.
+    """
+    type = String()
+    inherit_cache = True
+
+@compiles(lower_name)
+def _lower_name(element, compiler, **kw):
+    return f"lower({compiler.process(element.clauses, **kw)})"
+
+@compiles(lower_name, "postgresql")
+def _lower_name_postgresql(element, compiler, **kw):
+    return f'(lower({compiler.process(element.clauses, **kw)}) COLLATE "C")'
+
 class Employee(Base):
     __tablename__ = "emp_steven"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100))
-    salary = Column(Float)
-    salary_date = Column(Date)
+    salary = Column(Float, index=True)
+    salary_date = Column(Date, index=True)
+    # last write (UTC): the ORM sets it on insert and update, the server default on COPY loads
+    # and raw SQL inserts. Raw SQL UPDATEs must set it themselves or the change is not exported.
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        server_default=utcnow())
+
+# case-insensitive name search, keyset-paginated on (lower(name), id)
+Index("ix_emp_steven_name_lower", lower_name(Employee.name), Employee.id)
+
+# incremental export walks changes in (updated_at, id) order, see rds_export.py
+Index("ix_emp_steven_updated_at_id", Employee.updated_at, Employee.id)
+
+class ImportCheckpoint(Base):
+    """One row per Parquet row group loaded into emp_steven, written in the same transaction as its rows."""
+    __tablename__ = "emp_steven_import_log"
+
+    source = Column(String(512), primary_key=True)
+    row_group = Column(Integer, primary_key=True)
+    rows = Column(Integer)
+    loaded_at = Column(DateTime, default=datetime.utcnow)
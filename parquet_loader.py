@@ -0,0 +1,115 @@
+import configparser
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import insert, select
+from inspect_parquet import list_parquet_files
+from models import Employee, ImportCheckpoint
+from rds_task import DataImporter, RDSTableHandler, BULK_COLUMNS, BULK_WORKERS
+
+LOAD_BATCH_ROWS = 20_000   # rows decoded per iter_batches step inside a row group
+
+
+def resolve_source(source):
+    """(filesystem, [parquet paths]) for a local file/directory or an s3://bucket/prefix."""
+    fs, infos = list_parquet_files(source)
+    return fs, [info.path for info in infos]
+
+
+def _normalize(batch):
+    """
+    Keep the loader columns and coerce salary_date to dates: older pandas-written files
+    store it as a timestamp, or as a string (CSV read without parse_dates).
+    """
+    batch = batch.select(BULK_COLUMNS)
+    idx = batch.schema.get_field_index("salary_date")
+    column = batch.column(idx)
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.cast(column, pa.timestamp("us"))  # ISO dates, with or without a time part
+    if pa.types.is_timestamp(column.type):
+        batch = batch.set_column(idx, "salary_date", pc.cast(column, pa.date32(), safe=False))
+    return batch
+
+
+class ParquetImporter(DataImporter):
+    """
+    Loads existing Parquet output (file, directory or S3 prefix) into emp_steven.
+    Each row group is one unit of work: its rows and its ImportCheckpoint entry are
+    committed together, so a rerun skips exactly the row groups that already landed.
+    Workers decode one batch at a time, which bounds memory regardless of input size.
+    """
+    def __init__(self, db_config, workers=None, batch_rows=LOAD_BATCH_ROWS):
+        self.handler = RDSTableHandler(db_config)
+        self.workers = workers or db_config.getint('load_workers', fallback=BULK_WORKERS)
+        if self.handler.engine.dialect.name == "sqlite":
+            self.workers = 1  # single writer
+        self.batch_rows = batch_rows
+        self._local = threading.local()
+
+    def _loaded_row_groups(self):
+        with self.handler.engine.connect() as conn:
+            rows = conn.execute(select(ImportCheckpoint.source, ImportCheckpoint.row_group))
+            return {(source, row_group) for source, row_group in rows}
+
+    def _parquet_file(self, fs, path):
+        # one open ParquetFile per worker thread, reused across row groups of the same file
+        cached = getattr(self._local, "file", None)
+        if cached is None or cached[0] != path:
+            cached = (path, pq.ParquetFile(fs.open_input_file(path)))
+            self._local.file = cached
+        return cached[1]
+
+    def _load_row_group(self, fs, path, row_group):
+        pf = self._parquet_file(fs, path)
+        rows = 0
+        with self.handler.engine.connect() as conn:
+            for batch in pf.iter_batches(batch_size=self.batch_rows, row_groups=[row_group], columns=BULK_COLUMNS):
+                rows += self.handler.insert_rows(conn, _normalize(batch))
+            conn.execute(insert(ImportCheckpoint).values(source=path, row_group=row_group, rows=rows))
+            conn.commit()
+        return rows
+
+    def import_data(self, source):
+        start_time = time.time()
+        fs, files = resolve_source(source)
+        if not files:
+            print(f"No Parquet files found under {source}")
+            return 0
+
+        done = self._loaded_row_groups()
+        units = []
+        for path in files:
+            num_row_groups = pq.ParquetFile(fs.open_input_file(path)).metadata.num_row_groups
+            units += [(path, rg) for rg in range(num_row_groups) if (path, rg) not in done]
+        print(f"{len(files)} file(s), {len(units)} row group(s) to load, {len(done)} already loaded")
+
+        total = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._load_row_group, fs, path, rg) for path, rg in units]
+            try:
+                for i, future in enumerate(as_completed(futures), 1):
+                    total += future.result()
+                    elapsed = time.time() - start_time
+                    print(f"Row groups {i}/{len(units)}: {total:,} rows ({total / elapsed:,.0f} rows/s)")
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        print(f"Loaded {total:,} rows into {Employee.__tablename__} in {time.time() - start_time:.2f} seconds.")
+        return total
+
+
+def main():
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    source = sys.argv[1] if len(sys.argv) > 1 else input("Enter Parquet file, directory or s3:// prefix: ").strip()
+    ParquetImporter(config["RDS"]).import_data(source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import queue
+from abc import abstractmethod
+import threading
+import time
+from factory1 import DataImporter
+
+PIPELINE_ROWS = 1_000_000
+PIPELINE_CHUNK_ROWS = 50_000   # rows per generated Arrow batch
+CHANNEL_BATCHES = 4            # items a channel holds before its producer blocks
+
+# Stages run on their own threads and pass items (Arrow batches, or encoded bytes
+# between the Parquet encoder and its sink) through bounded channels. A full channel
+# blocks its producer, so the slowest stage sets the pace and memory stays at a few
+# batches per channel; with every stage busy at once, wall time approaches the
+# slowest stage rather than the sum of all stages.
+
+
+class PipelineCancelled(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+# ------------------ Channel ------------------
+class Channel:
+    """Bounded FIFO between two stages. Iterate it to consume until the producer closes it."""
+    _CLOSED = object()
+
+    def __init__(self, cancelled, maxsize=CHANNEL_BATCHES):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._cancelled = cancelled   # threading.Event shared by the whole pipeline
+        self.put_blocked_s = 0.0      # producer waiting for space (back-pressure)
+        self.get_blocked_s = 0.0      # consumer waiting for items (starved)
+        self.items = 0
+
+    def put(self, item):
+        start = time.perf_counter()
+        while True:
+            if self._cancelled.is_set():
+                raise PipelineCancelled()
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.put_blocked_s += time.perf_counter() - start
+
+    def close(self):
+        self.put(self._CLOSED)
+
+    def __iter__(self):
+        while True:
+            start = time.perf_counter()
+            while True:
+                if self._cancelled.is_set():
+                    raise PipelineCancelled()
+                try:
+                    item = self._queue.get(timeout=0.1)
+                    break
+                except queue.Empty:
+                    continue
+            self.get_blocked_s += time.perf_counter() - start
+            if item is self._CLOSED:
+                return
+            self.items += 1
+            yield item
+
+
+# ------------------ Stages ------------------
+class Stage(DataImporter):
+    """
+    A pipeline step. import_data(batches, emit) consumes the items of its input channel
+    (None for a source) and passes results to emit (None for a sink).
+    """
+    name = "stage"
+
+    @abstractmethod
+    def import_data(self, batches=None, emit=None):
+        pass
+
+
+class GenerateStage(Stage):
+    """Source: columnar employee batches from the s3_task generator."""
+    name = "generate"
+
+    def __init__(self, num_rows=PIPELINE_ROWS, chunk_rows=PIPELINE_CHUNK_ROWS):
+        self.num_rows = num_rows
+        self.chunk_rows = chunk_rows
+
+    def import_data(self, batches=None, emit=None):
+        import numpy as np
+        from faker import Faker
+        from s3_task import build_name_pools, generate_batch
+        rng = np.random.default_rng()
+        first_names, last_names = build_name_pools(Faker())
+        for start in range(1, self.num_rows + 1, self.chunk_rows):
+            end = min(start + self.chunk_rows, self.num_rows + 1)
+            emit(generate_batch(start, end, rng, first_names, last_names))
+
+
+class _BytesCollector:
+    """File object for ParquetWriter that hands back whatever was written since the last take()."""
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = memoryview(data).cast("B")
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def take(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ParquetEncodeStage(Stage):
+    """Encodes each batch as a Parquet row group and emits the file's bytes as they are produced."""
+    name = "parquet-encode"
+
+    def __init__(self, compression="snappy"):
+        self.compression = compression
+
+    def import_data(self, batches=None, emit=None):
+        import pyarrow.parquet as pq
+        from s3_task import EMPLOYEE_SCHEMA
+        sink = _BytesCollector()
+        with pq.ParquetWriter(sink, EMPLOYEE_SCHEMA, compression=self.compression) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                emit(sink.take())
+        emit(sink.take())  # footer
+
+
+class FileWriteStage(Stage):
+    """Sink: appends byte chunks to a local file."""
+    name = "file-write"
+
+    def __init__(self, path):
+        self.path = path
+
+    def import_data(self, batches=None, emit=None):
+        with open(self.path, "wb") as f:
+            for chunk in batches:
+                f.write(chunk)
+        print(f"Wrote {self.path}")
+
+
+class S3UploadStage(Stage):
+    """Sink: streams byte chunks to S3 as a multipart upload (aborted if the pipeline fails)."""
+    name = "s3-upload"
+
+    def __init__(self, bucket_name, s3_key, s3_client=None):
+        self.bucket_name = bucket_name
+        self.s3_key = s3_key
+        self.s3_client = s3_client
+
+    def import_data(self, batches=None, emit=None):
+        from upload_file import MultipartUploadSink
+        with MultipartUploadSink(self.bucket_name, self.s3_key, s3_client=self.s3_client) as sink:
+            for chunk in batches:
+                sink.write(chunk)
+
+
+class RDSLoadStage(Stage):
+    """Sink: bulk-loads Arrow batches into emp_steven through RDSTableHandler.bulk_insert."""
+    name = "rds-load"
+
+    def __init__(self, db_config, workers=None):
+        from rds_task import RDSTableHandler, BULK_WORKERS
+        self.handler = RDSTableHandler(db_config)
+        self.workers = workers or db_config.getint("load_workers", fallback=BULK_WORKERS)
+
+    def import_data(self, batches=None, emit=None):
+        rows = self.handler.bulk_insert(batches, workers=self.workers, progress=False)
+        print(f"Loaded {rows:,} rows into {self.handler.engine.url.render_as_string(hide_password=True)}")
+
+
+# ------------------ Runner ------------------
+class Pipeline:
+    """
+    A small DAG of stages. add(stage, after=upstream) gives the stage its own channel
+    from upstream; a stage with several downstream stages sends every item to each
+    of them (Arrow batches are shared, not copied). run() starts one thread per stage,
+    waits for all of them and re-raises the first failure after cancelling the rest.
+    """
+    def __init__(self, channel_batches=CHANNEL_BATCHES):
+        self.channel_batches = channel_batches
+        self._cancelled = threading.Event()
+        self._stages = []    # [stage, input channel or None, output channels]
+
+    def add(self, stage, after=None):
+        inbox = None
+        if after is not None:
+            inbox = Channel(self._cancelled, self.channel_batches)
+            next(entry for entry in self._stages if entry[0] is after)[2].append(inbox)
+        self._stages.append([stage, inbox, []])
+        return stage
+
+    def _run_stage(self, stage, inbox, outboxes, timings, errors):
+        start = time.perf_counter()
+
+        def emit(item):
+            for outbox in outboxes:
+                outbox.put(item)
+
+        try:
+            stage.import_data(inbox, emit if outboxes else None)
+            for outbox in outboxes:
+                outbox.close()
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            errors.append((stage.name, e))
+            self._cancelled.set()
+        finally:
+            timings[stage.name] = time.perf_counter() - start
+
+    def run(self):
+        """Run every stage concurrently; returns {stage name: stats} once all have finished."""
+        timings, errors = {}, []
+        threads = [
+            threading.Thread(target=self._run_stage, args=(stage, inbox, outboxes, timings, errors),
+                             name=stage.name, daemon=True)
+            for stage, inbox, outboxes in self._stages
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - start
+        if errors:
+            name, error = errors[0]
+            raise RuntimeError(f"pipeline stage '{name}' failed: {error}") from error
+
+        report = {}
+        for stage, inbox, outboxes in self._stages:
+            blocked = (inbox.get_blocked_s if inbox else 0.0) + sum(o.put_blocked_s for o in outboxes)
+            report[stage.name] = {"wall_s": round(timings[stage.name], 3), "blocked_s": round(blocked, 3),
+                                  "busy_s": round(timings[stage.name] - blocked, 3),
+                                  "items_in": inbox.items if inbox else None}
+        report["total"] = {"wall_s": round(wall, 3)}
+        return report
+
+
+def print_report(report):
+    total = report["total"]["wall_s"]
+    busiest = 0.0
+    for name, s in report.items():
+        if name == "total":
+            continue
+        busiest = max(busiest, s["busy_s"])
+        print(f"  {name:<16} busy {s['busy_s']:>7.2f}s  blocked {s['blocked_s']:>7.2f}s")
+    print(f"  total wall {total:.2f}s (busiest stage {busiest:.2f}s)")
+
+
+# ------------------ Importer ------------------
+class PipelineImporter(DataImporter):
+    """
+    Generate -> Parquet encode -> S3 upload (or a local file), with an RDS load fed from
+    the same batches, all running at once. Takes the whole ConfigParser: an optional
+    [PIPELINE] section (rows, chunk_rows, channel_batches, upload, load_rds) plus the
+    [S3] section for the bucket and [RDS] for the database.
+    """
+    def __init__(self, config):
+        settings = config["PIPELINE"] if config.has_section("PIPELINE") else config[config.default_section]
+        self.num_rows = settings.getint("rows", fallback=PIPELINE_ROWS)
+        self.chunk_rows = settings.getint("chunk_rows", fallback=PIPELINE_CHUNK_ROWS)
+        self.channel_batches = settings.getint("channel_batches", fallback=CHANNEL_BATCHES)
+        self.upload = settings.getboolean("upload", fallback=config.has_section("S3"))
+        self.load_rds = settings.getboolean("load_rds", fallback=config.has_section("RDS"))
+        self.config = config
+
+    def build(self):
+        from s3_task import OUTPUT_PARQUET
+        pipeline = Pipeline(self.channel_batches)
+        generate = pipeline.add(GenerateStage(self.num_rows, self.chunk_rows))
+        encode = pipeline.add(ParquetEncodeStage(), after=generate)
+        if self.upload:
+            from upload_file import FileUpload
+            bucket_name = self.config["S3"]["bucket_name"]
+            pipeline.add(S3UploadStage(bucket_name, FileUpload(bucket_name).build_s3_key(OUTPUT_PARQUET)), after=encode)
+        else:
+            pipeline.add(FileWriteStage(OUTPUT_PARQUET), after=encode)
+        if self.load_rds:
+            pipeline.add(RDSLoadStage(self.config["RDS"]), after=generate)
+        return pipeline
+
+    def import_data(self):
+        print(f"Running pipeline for {self.num_rows:,} rows ...")
+        report = self.build().run()
+        print_report(report)
+        return report
+
+
+def main():
+    from create_config import load_config
+    PipelineImporter(load_config()).import_data()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, tuple_
+from create_config import load_config
+from models import Employee
+from rds_task import RDSTableHandler, ITER_BATCH_ROWS
+
+EXPORT_DIR = "exports"
+EXPORT_STATE_FILE = ".export_watermark.json"
+# Rows newer than now - lag are left for the next run: a transaction that set updated_at
+# just before the export started may not have committed yet, and app servers' clocks drift.
+EXPORT_LAG_SECONDS = 60
+
+EXPORT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("name", pa.string()),
+    ("salary", pa.float64()),
+    ("salary_date", pa.date32()),
+    ("updated_at", pa.timestamp("us")),
+])
+
+
+class IncrementalExporter:
+    """
+    Exports rows of emp_steven changed since the last run to a new Parquet file.
+
+    The watermark is the (updated_at, id) of the last exported row, kept in a JSON
+    state file. Each run streams rows past it in (updated_at, id) order through a
+    server-side cursor (served by ix_emp_steven_updated_at_id), writes them batch by
+    batch, and saves the new watermark only after the file is complete, so a failed
+    run is simply repeated. Work scales with the rows changed, not the table size.
+    Deleted rows leave no trace in the table and are not exported, nor are raw SQL
+    UPDATEs that do not set updated_at.
+    """
+    def __init__(self, db_config, output_dir=EXPORT_DIR, state_path=EXPORT_STATE_FILE,
+                 batch_rows=ITER_BATCH_ROWS, lag=EXPORT_LAG_SECONDS):
+        self.handler = RDSTableHandler(db_config)
+        self.output_dir = output_dir
+        self.state_path = state_path
+        self.batch_rows = batch_rows
+        self.lag = lag
+
+    def load_watermark(self):
+        """(updated_at, id) of the last exported row, or None before the first export."""
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        return datetime.fromisoformat(state["updated_at"]), state["id"]
+
+    def save_watermark(self, watermark, **extra):
+        state = {"updated_at": watermark[0].isoformat(), "id": watermark[1], **extra}
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.state_path)  # never leave a half-written state file
+
+    def iter_changes(self, watermark, until):
+        """Yield lists of rows with watermark < (updated_at, id) and updated_at < until, in that order."""
+        stmt = (
+            select(Employee.id, Employee.name, Employee.salary, Employee.salary_date, Employee.updated_at)
+            .where(Employee.updated_at < until)
+            .order_by(Employee.updated_at, Employee.id)
+        )
+        if watermark is not None:
+            stmt = stmt.where(tuple_(Employee.updated_at, Employee.id) > tuple_(*watermark))
+        with self.handler.engine.connect() as conn:
+            result = conn.execution_options(yield_per=self.batch_rows).execute(stmt)
+            for rows in result.partitions():
+                yield rows
+
+    def export(self):
+        """Write the rows changed since the last run; returns (path or None, rows exported)."""
+        start_time = time.time()
+        watermark = self.load_watermark()
+        until = datetime.utcnow() - timedelta(seconds=self.lag)
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{Employee.__tablename__}_changes_{until:%Y%m%d_%H%M%S_%f}.parquet")
+        tmp = f"{path}.tmp"
+
+        rows, last = 0, watermark
+        writer = None
+        try:
+            for batch_rows in self.iter_changes(watermark, until):
+                columns = list(zip(*batch_rows))
+                batch = pa.RecordBatch.from_arrays(
+                    [pa.array(col, type=field.type) for col, field in zip(columns, EXPORT_SCHEMA)],
+                    schema=EXPORT_SCHEMA,
+                )
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, EXPORT_SCHEMA)
+                writer.write_batch(batch)
+                rows += len(batch_rows)
+                last = (batch_rows[-1].updated_at, batch_rows[-1].id)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+                os.remove(tmp)
+            raise
+
+        if writer is None:
+            print(f"No changes since {watermark[0].isoformat() if watermark else 'the beginning'}")
+            return None, 0
+        writer.close()
+        try:
+            os.link(tmp, path)  # unlike os.replace, fails instead of overwriting an earlier export
+        finally:
+            os.remove(tmp)
+        self.save_watermark(last, file=path, rows=rows)
+        print(f"Exported {rows:,} changed rows to {path} in {time.time() - start_time:.2f} seconds.")
+        return path, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export rows of emp_steven changed since the last run to Parquet")
+    parser.add_argument("--output-dir", default=EXPORT_DIR)
+    parser.add_argument("--state", default=EXPORT_STATE_FILE, help="watermark file")
+    parser.add_argument("--lag", type=int, default=EXPORT_LAG_SECONDS, help="seconds of recent changes left for the next run")
+    parser.add_argument("--reset", action="store_true", help="forget the watermark and export every row")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    if args.reset and os.path.exists(args.state):
+        os.remove(args.state)
+    IncrementalExporter(config["RDS"], args.output_dir, args.state, lag=args.lag).export()
+
+
+if __name__ == "__main__":
+    main()
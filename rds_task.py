@@ -1,12 +1,68 @@
 from abc import ABC, abstractmethod
-from datetime import date
-from models import Base, Employee
-from faker import Faker
-import random
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date
+from datetime import datetime
+from models import Base, Employee, utcnow
+import csv
+import io
+import queue
+import sys
+import threading
+import time
+from sqlalchemy import create_engine, func, insert, inspect, select, text, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import sessionmaker
 import configparser
 
+BULK_COLUMNS = ["name", "salary", "salary_date"]
+BULK_BATCH_ROWS = 10_000     # rows per generated batch in insert_sample_records
+BULK_COMMIT_ROWS = 50_000    # rows per transaction on each loader connection
+BULK_WORKERS = 4             # parallel loader connections
+ITER_BATCH_ROWS = 10_000     # rows per batch from iter_batches
+
+DEFAULT_MAX_OVERFLOW = 10   # QueuePool's own default when [RDS] sets no max_overflow
+
+# async driver used for a dialect when [RDS] has no async_driver key
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "mysql": "aiomysql", "sqlite": "aiosqlite"}
+
+
+def build_database_url(config, driver=None):
+    """URL from the [RDS] section; a full `url` key wins over the individual parts."""
+    if config.get('url'):
+        url = make_url(config['url'])
+        return url.set(drivername=f"{url.get_backend_name()}+{driver}") if driver else url
+    return (
+        f"{config['dialect']}+{driver or config['driver']}://"
+        f"{config['username']}:{config['password']}@"
+        f"{config['host']}:{config['port']}/{config['database']}"
+    )
+
+
+def engine_options(config):
+    """Connection pool settings from the [RDS] section (only the keys that are set)."""
+    options = {}
+    for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+        if config.get(key):
+            options[key] = config.getint(key)
+    if config.get("pool_pre_ping"):
+        options["pool_pre_ping"] = config.getboolean("pool_pre_ping")
+    return options
+
+
+def pool_status(engine, max_overflow=DEFAULT_MAX_OVERFLOW):
+    """Pool usage; max_overflow is the configured value (-1 means unlimited, so no utilization)."""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"pool": type(pool).__name__, "status": pool.status()}
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "utilization": round(pool.checkedout() / capacity, 3) if capacity else None,
+    }
+
 
 class DataImporter(ABC):
     @abstractmethod
@@ -28,31 +84,303 @@ class RDSImporter(DataImporter):
 
 class RDSTableHandler:
     def __init__(self, config):
-        self.database_url = (
-            f"{config['dialect']}+{config['driver']}://"
-            f"{config['username']}:{config['password']}@"
-            f"{config['host']}:{config['port']}/{config['database']}"
-        )
-        self.engine = create_engine(self.database_url)
+        self.config = config
+        self.database_url = build_database_url(config)
+        self.engine = create_engine(self.database_url, **engine_options(config))
         self.Session = sessionmaker(bind=self.engine)
         Base.metadata.create_all(self.engine)  # create table if not exists
+        self.supports_fuzzy_search = self._has_trigram_index()
+        self._async_engine = None
+        self._async_session = None
+
+    # ------------------ Migrations ------------------
+    def migrate(self):
+        """
+        One-off schema upgrade for a table created by an older version (python rds_task.py
+        migrate). create_all builds a new table complete, but never alters an existing one.
+        """
+        self.ensure_columns()
+        self.ensure_indexes()  # after ensure_columns: ix_emp_steven_updated_at_id needs the column
+        self.supports_fuzzy_search = self._has_trigram_index()
+
+    def ensure_columns(self):
+        """
+        create_all does not alter existing tables: add updated_at to an older emp_steven
+        and backfill it, so every existing row is picked up by the first incremental export.
+        """
+        table = Employee.__tablename__
+        if "updated_at" in {c["name"] for c in inspect(self.engine).get_columns(table)}:
+            return
+        column_type = Employee.__table__.c.updated_at.type.compile(dialect=self.engine.dialect)
+        # SQLite cannot ADD COLUMN with a non-constant default; elsewhere the default also backfills
+        default = "" if self.engine.dialect.name == "sqlite" else f" DEFAULT ({utcnow().compile(dialect=self.engine.dialect)})"
+        with self.engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at {column_type}{default}"))
+            conn.execute(update(Employee).where(Employee.updated_at.is_(None)).values(updated_at=datetime.utcnow()))
+            if self.engine.dialect.name == "sqlite":
+                # stands in for the missing server default on rows inserted by raw SQL
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_updated_at AFTER INSERT ON {table} "
+                    f"WHEN NEW.updated_at IS NULL BEGIN "
+                    f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id; END"
+                ))
+        print(f"Added updated_at to {table}")
+
+    def ensure_indexes(self):
+        """
+        Add any model index the table is missing. On PostgreSQL the indexes are built
+        with CREATE INDEX CONCURRENTLY, which does not block writes while it scans the
+        table but cannot run inside a transaction, hence the autocommit connection.
+        """
+        table = Employee.__tablename__
+        if self.engine.dialect.name != "postgresql":
+            if self.engine.dialect.name == "sqlite":
+                # IF NOT EXISTS avoids reflecting expression indexes, which SQLite cannot do
+                with self.engine.begin() as conn:
+                    for index in Employee.__table__.indexes:
+                        conn.execute(CreateIndex(index, if_not_exists=True))
+            else:
+                for index in Employee.__table__.indexes:
+                    index.create(self.engine, checkfirst=True)
+            return
+
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            # a failed concurrent build leaves an INVALID index that IF NOT EXISTS would keep
+            stale = conn.execute(text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = to_regclass(:t) AND NOT i.indisvalid"
+            ), {"t": table}).scalars().all()
+            # the name index used to be on lower(name) in the default collation; rebuild it in "C"
+            definition = conn.execute(
+                text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"), {"name": "ix_emp_steven_name_lower"}
+            ).scalar()
+            if definition and 'COLLATE "C"' not in definition:
+                stale.append("ix_emp_steven_name_lower")
+            for name in stale:
+                print(f"Dropping index {name}")
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+            for index in Employee.__table__.indexes:
+                sql = str(CreateIndex(index, if_not_exists=True).compile(dialect=self.engine.dialect))
+                conn.execute(text(sql.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)))
+
+            # trigram index for fuzzy name search; needs the pg_trgm extension
+            try:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_name_trgm "
+                    f"ON {table} USING gin (name gin_trgm_ops)"
+                ))
+            except Exception as e:
+                print(f"Fuzzy name search disabled (pg_trgm unavailable): {e}")
+
+    def _has_trigram_index(self):
+        """Whether a valid trigram index on name exists (fuzzy search is PostgreSQL only)."""
+        if self.engine.dialect.name != "postgresql":
+            return False
+        with self.engine.connect() as conn:
+            return bool(conn.execute(
+                text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+                {"name": f"ix_{Employee.__tablename__}_name_trgm"},
+            ).scalar())
+
+    # ------------------ asyncio path ------------------
+    @property
+    def async_engine(self):
+        """AsyncEngine on the same database, created on first use (needs an async driver)."""
+        if self._async_engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            backend = make_url(self.database_url).get_backend_name()
+            driver = self.config.get('async_driver') or ASYNC_DRIVERS[backend]
+            self._async_engine = create_async_engine(
+                build_database_url(self.config, driver), **engine_options(self.config)
+            )
+        return self._async_engine
+
+    @property
+    def AsyncSession(self):
+        if self._async_session is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+            self._async_session = async_sessionmaker(self.async_engine, expire_on_commit=False)
+        return self._async_session
+
+    def pool_status(self):
+        max_overflow = engine_options(self.config).get("max_overflow", DEFAULT_MAX_OVERFLOW)
+        status = {"sync": pool_status(self.engine, max_overflow)}
+        if self._async_engine is not None:
+            status["async"] = pool_status(self._async_engine.sync_engine, max_overflow)
+        return status
 
     def is_table_empty(self):
-        session = self.Session()
-        count = session.query(Employee).count()
-        session.close()
-        return count == 0
+        return not self.has_rows()
 
-    def insert_sample_records(self, n=10000):
-        session = self.Session()
-        fake=Faker()
-        employees = [
-            Employee(name=fake.name(), salary=round(random.uniform(30_000, 150_000), 2), salary_date=fake.date_between(start_date='-1y', end_date='today'))
-            for i in range(n)
-        ]
-        session.bulk_save_objects(employees)
-        session.commit()
-        session.close()
+    def has_rows(self):
+        """EXISTS-style probe: stops at the first row instead of counting them all."""
+        with self.engine.connect() as conn:
+            return conn.execute(select(Employee.id).limit(1)).first() is not None
+
+    def approximate_count(self):
+        """
+        Row count without a full scan. PostgreSQL and MySQL report their table
+        statistics; elsewhere it is the primary-key span max(id) - min(id) + 1, an
+        upper bound read from the index ends. Statistics can lag far behind (MySQL 8
+        caches TABLE_ROWS for up to a day, so it often reads 0 right after an import):
+        they are capped at the span, and 0 or missing stats fall back to the span.
+        """
+        table = Employee.__tablename__
+        dialect = self.engine.dialect.name
+        with self.engine.connect() as conn:
+            estimate = None
+            if dialect == "postgresql":
+                estimate = conn.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table}
+                ).scalar()
+            elif dialect in ("mysql", "mariadb"):
+                estimate = conn.execute(
+                    text("SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t"),
+                    {"t": table},
+                ).scalar()
+            low, high = conn.execute(select(func.min(Employee.id), func.max(Employee.id))).one()
+            span = 0 if low is None else high - low + 1
+            if estimate is not None and estimate > 0:
+                return min(int(estimate), span)
+            return span
+
+    def iter_batches(self, batch_size=ITER_BATCH_ROWS):
+        """Yield lists of (id, name, salary, salary_date) rows in id order through a server-side cursor."""
+        stmt = select(Employee.id, Employee.name, Employee.salary, Employee.salary_date).order_by(Employee.id)
+        with self.engine.connect() as conn:
+            result = conn.execution_options(yield_per=batch_size).execute(stmt)
+            for rows in result.partitions():
+                yield rows
+
+    def insert_sample_records(self, n=10000, **bulk_options):
+        """Generate n employees column-wise (s3_task generator) and load them with bulk_insert."""
+        import numpy as np
+        from faker import Faker
+        from s3_task import build_name_pools, generate_batch
+        rng = np.random.default_rng()
+        first_names, last_names = build_name_pools(Faker())
+        batches = (
+            generate_batch(start, min(start + BULK_BATCH_ROWS, n), rng, first_names, last_names)
+            for start in range(0, n, BULK_BATCH_ROWS)
+        )
+        return self.bulk_insert(batches, **bulk_options)
+
+    # ------------------ Bulk load ------------------
+    def insert_rows(self, conn, rows):
+        """
+        Insert one batch on an open connection without committing. rows is a pyarrow
+        RecordBatch/Table with name, salary and salary_date columns, or a list of
+        (name, salary, salary_date) tuples. Returns the number of rows written.
+        """
+        if hasattr(rows, "num_rows"):  # pyarrow RecordBatch / Table
+            rows = rows.select(BULK_COLUMNS)
+            n = rows.num_rows
+        else:
+            n = len(rows)
+        if n == 0:
+            return 0
+
+        if conn.dialect.name == "postgresql" and conn.dialect.driver in ("psycopg2", "psycopg"):
+            self._copy_rows(conn, rows)
+        else:
+            # executemany; MySQL drivers rewrite this into multi-row INSERT ... VALUES
+            if not isinstance(rows, list):
+                rows = rows.to_pylist()
+            else:
+                rows = [dict(zip(BULK_COLUMNS, row)) for row in rows]
+            conn.execute(insert(Employee.__table__), rows)
+        return n
+
+    def _copy_rows(self, conn, rows):
+        """PostgreSQL fast path: stream the batch as CSV through COPY ... FROM STDIN."""
+        buf = io.BytesIO()
+        if isinstance(rows, list):
+            text = io.StringIO()
+            csv.writer(text).writerows(rows)
+            buf.write(text.getvalue().encode())
+        else:
+            import pyarrow.csv as pa_csv
+            pa_csv.write_csv(rows, buf, pa_csv.WriteOptions(include_header=False))
+        buf.seek(0)
+
+        sql = f"COPY {Employee.__tablename__} ({', '.join(BULK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if conn.dialect.driver == "psycopg2":
+                cursor.copy_expert(sql, buf)
+            else:
+                with cursor.copy(sql) as copy:
+                    copy.write(buf.getvalue())
+        finally:
+            cursor.close()
+
+    def bulk_insert(self, batches, commit_every=BULK_COMMIT_ROWS, workers=BULK_WORKERS, progress=True):
+        """
+        Load an iterable of batches (see insert_rows) over `workers` connections in
+        parallel. Each connection commits every `commit_every` rows, so a failure
+        keeps what was already committed. Memory is bounded to a few batches in flight.
+        Returns the number of rows inserted.
+        """
+        if self.engine.dialect.name == "sqlite":
+            workers = 1  # SQLite allows a single writer; extra connections only contend for the lock
+
+        pending_batches = queue.Queue(maxsize=workers * 2)
+        lock = threading.Lock()
+        state = {"rows": 0, "error": None}
+        start_time = time.time()
+
+        def report(rows):
+            with lock:
+                state["rows"] += rows
+                total = state["rows"]
+            if progress and rows:
+                elapsed = time.time() - start_time
+                print(f"Committed {total:,} rows ({total / elapsed:,.0f} rows/s)")
+
+        def load():
+            finished = False
+            try:
+                with self.engine.connect() as conn:
+                    uncommitted = 0
+                    while True:
+                        batch = pending_batches.get()
+                        if batch is None:
+                            finished = True
+                            break
+                        if state["error"] is not None:
+                            continue  # keep draining so the producer never blocks
+                        uncommitted += self.insert_rows(conn, batch)
+                        if uncommitted >= commit_every:
+                            conn.commit()
+                            report(uncommitted)
+                            uncommitted = 0
+                    if state["error"] is None:
+                        conn.commit()
+                        report(uncommitted)
+            except Exception as e:
+                state["error"] = state["error"] or e
+                while not finished:
+                    finished = pending_batches.get() is None
+
+        threads = [threading.Thread(target=load, daemon=True) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        try:
+            for batch in batches:
+                if state["error"] is not None:
+                    break
+                pending_batches.put(batch)
+        finally:
+            for _ in threads:
+                pending_batches.put(None)
+            for t in threads:
+                t.join()
+
+        if state["error"] is not None:
+            raise state["error"]
+        return state["rows"]
 
     def get_all(self):
         session = self.Session()
@@ -65,6 +393,11 @@ def main():
     config = configparser.ConfigParser()
     config.read("config.ini")
 
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+        # python rds_task.py migrate -- run once per deployment, not on every start
+        RDSTableHandler(config["RDS"]).migrate()
+        return
+
     import_type = "RDS"
 
     if import_type == "RDS":
@@ -75,8 +408,7 @@ def main():
 
 
         handler = importer.handler
-        employees = handler.get_all()
-        print(f"Total records in DB: {len(employees)}")
+        print(f"Total records in DB (approx.): {handler.approximate_count():,}")
 
 
 
@@ -0,0 +1,336 @@
+import argparse
+import io
+import operator
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from cache import LRUCache
+from upload_file import S3_FOLDER
+
+READ_BLOCK_SIZE = 64 * 1024     # bytes per cached block; a read fetches all its missing blocks in one ranged GET
+BLOCK_CACHE_BLOCKS = 4096       # blocks kept in the shared LRU (4096 x 64 KiB = 256 MiB)
+READ_WORKERS = 16               # files read concurrently (S3 latency bound)
+
+# Shared by every reader in the process unless one is passed in; keys include the
+# object's ETag, so a re-uploaded object never serves stale blocks.
+block_cache = LRUCache(maxsize=BLOCK_CACHE_BLOCKS, ttl=None)
+
+
+# ------------------ Ranged-GET file object ------------------
+class S3RangeFile(io.RawIOBase):
+    """
+    Read-only, seekable file object over one S3 object. Reads are served from
+    block-aligned ranged GETs through the block cache, so pyarrow only transfers
+    the footer and the column chunks it actually decodes.
+    """
+    def __init__(self, s3_client, bucket, key, size=None, etag=None, cache=block_cache, block_size=READ_BLOCK_SIZE):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        if size is None or etag is None:
+            head = s3_client.head_object(Bucket=bucket, Key=key)
+            size, etag = head["ContentLength"], head["ETag"]
+        self._size = size
+        self.etag = etag
+        self.cache = cache
+        self.block_size = block_size
+        self._position = 0
+        self.requests = 0
+        self.bytes_fetched = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def size(self):
+        return self._size
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def _fetch(self, first, last):
+        """Ranged GET of blocks first..last (inclusive); caches and returns them."""
+        start = first * self.block_size
+        end = min((last + 1) * self.block_size, self._size) - 1
+        body = self.s3_client.get_object(Bucket=self.bucket, Key=self.key, Range=f"bytes={start}-{end}")["Body"].read()
+        self.requests += 1
+        self.bytes_fetched += len(body)
+        blocks = {}
+        for index in range(first, last + 1):
+            offset = (index - first) * self.block_size
+            blocks[index] = body[offset:offset + self.block_size]
+            if self.cache is not None:
+                self.cache.set((self.bucket, self.key, self.etag, self.block_size, index), blocks[index])
+        return blocks
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = self._size - self._position
+        n = min(n, self._size - self._position)
+        if n <= 0:
+            return b""
+        first = self._position // self.block_size
+        last = (self._position + n - 1) // self.block_size
+
+        blocks, missing = {}, []
+        for index in range(first, last + 1):
+            cached = self.cache.get((self.bucket, self.key, self.etag, self.block_size, index)) if self.cache is not None else None
+            if cached is None:
+                missing.append(index)
+            else:
+                blocks[index] = cached
+        # one GET per contiguous run of missing blocks
+        while missing:
+            run_end = 0
+            while run_end + 1 < len(missing) and missing[run_end + 1] == missing[run_end] + 1:
+                run_end += 1
+            blocks.update(self._fetch(missing[0], missing[run_end]))
+            missing = missing[run_end + 1:]
+
+        data = b"".join(blocks[index] for index in range(first, last + 1))
+        offset = self._position - first * self.block_size
+        self._position += n
+        return data[offset:offset + n]
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+# ------------------ Predicate pruning ------------------
+# filters are (column, op, value) tuples combined with AND, as in pyarrow's filters=
+OPS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+_CAST_ERRORS = (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError)
+
+def _coerce(op, value, arrow_type):
+    """
+    The filter value (a list for "in") as the Python value of arrow_type, e.g. a CLI string
+    or a date for a timestamp or string salary_date; None if it cannot be converted.
+    """
+    try:
+        if op == "in":
+            return [pa.scalar(v).cast(arrow_type).as_py() for v in value]
+        return pa.scalar(value).cast(arrow_type).as_py()
+    except _CAST_ERRORS:
+        return None
+
+def _may_match(lo, hi, op, value):
+    """Whether any value in [lo, hi] can satisfy `x op value`."""
+    if op == "in":
+        return any(lo <= v <= hi for v in value)
+    if op == "==":
+        return lo <= value <= hi
+    if op == "!=":
+        return not (lo == hi == value)
+    if op in ("<", "<="):
+        return OPS[op](lo, value)
+    return OPS[op](hi, value)  # > / >=
+
+def _partition_values(key):
+    """Hive partition values encoded in the object key, e.g. year=2025/month=7 -> {year: 2025, month: 7}."""
+    values = {}
+    for part in key.split("/")[:-1]:
+        name, sep, raw = part.partition("=")
+        if sep:
+            values[name] = int(raw) if raw.lstrip("-").isdigit() else raw
+    return values
+
+def keep_row_groups(metadata, schema, filters):
+    """Indexes of row groups whose min/max statistics do not rule out every filter."""
+    positions = {metadata.schema.column(i).path: i for i in range(metadata.num_columns)}
+    keep = []
+    for i in range(metadata.num_row_groups):
+        rg = metadata.row_group(i)
+        for column, op, value in filters:
+            if column not in positions:
+                continue
+            stats = rg.column(positions[column]).statistics
+            if stats is None or not stats.has_min_max:
+                continue
+            value = _coerce(op, value, schema.field(column).type)
+            if value is None:
+                continue  # not comparable with this column; the exact filter still applies
+            try:
+                if not _may_match(stats.min, stats.max, op, value):
+                    break
+            except TypeError:
+                continue  # statistics of another Python type; read the row group
+
+        else:
+            keep.append(i)
+    return keep
+
+def _filter_expression(filters, schema):
+    """
+    Strings are parsed as the column's type; a date or datetime compared with a column of
+    another type (older files store salary_date as timestamp or string) casts the column
+    to the value's type instead, so a date filter has date semantics on every file.
+    """
+    expression = None
+    for column, op, value in filters:
+        if column not in schema.names:
+            continue  # partition key, already applied to the object path
+        field_type = schema.field(column).type
+        field = pc.field(column)
+        sample = value[0] if op == "in" and value else value
+        value_type = None if isinstance(sample, str) else pa.scalar(sample).type
+        if value_type is not None and pa.types.is_temporal(value_type) and value_type != field_type:
+            field = field.cast(value_type, safe=False)
+        else:
+            value = _coerce(op, value, field_type)
+            if value is None:
+                raise ValueError(f"cannot compare {column} ({field_type}) with {sample!r}")
+        if op == "in":
+            term = field.isin(value)
+        else:
+            term = OPS[op](field, pc.scalar(value))
+        expression = term if expression is None else expression & term
+    return expression
+
+
+# ------------------ Reader ------------------
+class S3ParquetReader:
+    """
+    Reads Parquet objects under s3://bucket/prefix selectively: per object it fetches
+    the footer, prunes row groups on min/max statistics (and whole objects on Hive
+    partition keys), then reads only the surviving row groups and needed columns.
+    Objects are read concurrently; bytes_fetched/requests report what was transferred.
+    """
+    def __init__(self, bucket, s3_client=None, cache=block_cache, workers=READ_WORKERS, block_size=READ_BLOCK_SIZE):
+        self.bucket = bucket
+        self.s3_client = s3_client or boto3.client('s3')
+        self.cache = cache
+        self.workers = workers
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self.bytes_fetched = 0
+        self.requests = 0
+        self.row_groups_read = 0
+        self.row_groups_total = 0
+
+    def list_objects(self, prefix=f"{S3_FOLDER}/"):
+        """[(key, size, etag)] of every .parquet object under prefix."""
+        objects = []
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                if obj["Key"].endswith(".parquet"):
+                    objects.append((obj["Key"], obj["Size"], obj["ETag"]))
+        return objects
+
+    def open(self, key, size=None, etag=None):
+        return S3RangeFile(self.s3_client, self.bucket, key, size, etag, self.cache, self.block_size)
+
+    def _read_object(self, obj, columns, filters):
+        key, size, etag = obj
+        partition = _partition_values(key)
+        for column, op, value in filters:
+            if column in partition:
+                kind = type(partition[column])
+                try:
+                    value = [kind(v) for v in value] if op == "in" else kind(value)
+                except (TypeError, ValueError):
+                    continue
+                if not _may_match(partition[column], partition[column], op, value):
+                    return None  # pruned on the key alone, footer not fetched
+
+        f = self.open(key, size, etag)
+        try:
+            pf = pq.ParquetFile(f)
+            schema = pf.schema_arrow
+            groups = keep_row_groups(pf.metadata, schema, filters)
+            if groups:
+                needed = None
+                if columns is not None:
+                    needed = list(dict.fromkeys([c for c in columns if c in schema.names] +
+                                                [c for c, _, _ in filters if c in schema.names]))
+                table = pf.read_row_groups(groups, columns=needed)
+                expression = _filter_expression(filters, schema)
+                if expression is not None:
+                    table = table.filter(expression)
+                if columns is not None:
+                    table = table.select([c for c in columns if c in table.column_names])
+            else:
+                table = None
+            with self._lock:
+                self.bytes_fetched += f.bytes_fetched
+                self.requests += f.requests
+                self.row_groups_read += len(groups)
+                self.row_groups_total += pf.metadata.num_row_groups
+            return table
+        finally:
+            f.close()
+
+    def read(self, prefix=f"{S3_FOLDER}/", columns=None, filters=None, keys=None):
+        """
+        Read the matching rows of every Parquet object under prefix (or just `keys`)
+        into one table. columns limits the columns returned; filters is a list of
+        (column, op, value) tuples ANDed together, op one of == != < <= > >= in.
+        """
+        filters = list(filters or [])
+        objects = self.list_objects(prefix) if keys is None else [(key, None, None) for key in keys]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            tables = [t for t in pool.map(lambda obj: self._read_object(obj, columns, filters), objects) if t is not None]
+        if not tables:
+            return None
+        return pa.concat_tables(tables, promote_options="default")
+
+    def stats(self):
+        return {"bytes_fetched": self.bytes_fetched, "requests": self.requests,
+                "row_groups_read": self.row_groups_read, "row_groups_total": self.row_groups_total,
+                "block_cache": self.cache.stats() if self.cache is not None else None}
+
+
+def average_salary(reader, start, end, prefix=f"{S3_FOLDER}/"):
+    """Mean salary for salary_date in [start, end), reading only salary and salary_date."""
+    table = reader.read(prefix, columns=["salary"],
+                        filters=[("salary_date", ">=", start), ("salary_date", "<", end)])
+    if table is None or table.num_rows == 0:
+        return None
+    return pc.mean(table["salary"]).as_py()
+
+
+def _parse_filter(text):
+    for op in ("<=", ">=", "!=", "==", "<", ">", "="):
+        column, sep, value = text.partition(op)
+        if sep:
+            return column.strip(), "==" if op == "=" else op, value.strip()
+    raise argparse.ArgumentTypeError(f"bad filter {text!r}; use e.g. salary_date>=2025-01-01")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Selective Parquet reads from S3 (ranged GETs)")
+    parser.add_argument("uri", help="s3://bucket/prefix")
+    parser.add_argument("-c", "--columns", help="comma separated columns to return")
+    parser.add_argument("-w", "--where", action="append", type=_parse_filter, default=[],
+                        help="filter such as salary_date>=2025-01-01 (repeatable, ANDed)")
+    parser.add_argument("--workers", type=int, default=READ_WORKERS)
+    args = parser.parse_args(argv)
+
+    bucket, _, prefix = args.uri.removeprefix("s3://").partition("/")
+    reader = S3ParquetReader(bucket, workers=args.workers)
+    table = reader.read(prefix, columns=args.columns.split(",") if args.columns else None, filters=args.where)
+    stats = reader.stats()
+    print(f"{table.num_rows if table is not None else 0:,} rows; read {stats['row_groups_read']} of "
+          f"{stats['row_groups_total']} row groups, {stats['bytes_fetched'] / 1e3:,.1f} kB in {stats['requests']} requests")
+    if table is not None:
+        print(table.slice(0, 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,99 +1,561 @@
 import multiprocessing as mp
+import bisect
+from multiprocessing import shared_memory, resource_tracker
 from faker import Faker
-import pandas as pd
 import random
+import os
+import ctypes
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 import pyarrow.parquet as pq
 from math import ceil
 import datetime
+import json
+import queue
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from telemetry import StageStats, TimedFile, MetricsCollector, print_report
 
 NUM_ROWS = 1_000_000
 GEN_CHUNK_ROWS = 50_000    # rows per generated chunk 
 QUEUE_MAX_CHUNKS = 4      # how many chunks each queue can hold before producers block
+GENERATOR_MODE = "columnar"  # "columnar" (NumPy + name pools, RecordBatch chunks) or "faker" (row by row)
+NAME_POOL_SIZE = 2_000     # faker draws used to build each first/last name pool
+PARQUET_OUTPUT = "file"    # "file" (one Parquet file) or "dataset" (year/month partitioned directory)
+DATASET_ROW_GROUP_ROWS = 125_000  # rows per row group in dataset mode
+DATASET_FLUSH_ROWS = 500_000      # rows buffered per partition before a sorted flush
 timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 OUTPUT_CSV = f"employees_{timestamp}.csv"
 OUTPUT_PARQUET = f"employees_{timestamp}.parquet"
+OUTPUT_DATASET = f"employees_{timestamp}_dataset"
+OUTPUT_SHARDS = f"employees_{timestamp}_parts"  # csv/ and parquet/ part files plus manifest.json when sharded
+NUM_WRITERS = 1           # writer processes per format; "auto" sizes producers and writers from a calibration run
+CSV_COMPRESSION = None    # None, "gzip" or "zstd"; adds .gz/.zst to OUTPUT_CSV
+CSV_COMPRESSION_LEVEL = None
+CSV_ENCODER_THREADS = 2   # threads encoding (and compressing) chunks for the one CSV file writer
+CSV_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+TELEMETRY = True          # per-stage rows/s, queue depth and writer stall report at the end of main
+METRICS_FILE = None       # e.g. "metrics.jsonl" to also stream snapshots there during the run
+ABORT_POLL_S = 0.5        # how often blocked producers and main check whether a process has failed
+ABORT_PRODUCER_WAIT_S = 30  # after a failure, time producers get to free their segments before being killed
 
-def generate_worker(start_id, end_id, q_csv, q_parquet, chunk_rows):
+EMPLOYEE_SCHEMA = pa.schema([
+    ("empid", pa.int64()),
+    ("name", pa.string()),
+    ("salary", pa.float64()),
+    ("salary_date", pa.date32()),
+])
+
+# ------------------ Columnar generator ------------------
+def build_name_pools(fake, pool_size=NAME_POOL_SIZE):
+    """Draw first/last names from Faker once so rows can be built by index."""
+    first_names = sorted({fake.first_name() for _ in range(pool_size)})
+    last_names = sorted({fake.last_name() for _ in range(pool_size)})
+    return pa.array(first_names, pa.string()), pa.array(last_names, pa.string())
+
+def generate_batch(start_id, end_id, rng, first_names, last_names, today=None):
+    """Build rows [start_id, end_id) column by column as a RecordBatch."""
+    n = end_id - start_id
+    today = today or datetime.date.today()
+    # same ranges as the faker path: salary in [30k, 150k], salary_date within the last year
+    span_days = 365
+    first_day = today - datetime.timedelta(days=span_days)
+
+    empid = pa.array(np.arange(start_id, end_id, dtype=np.int64))
+    first = first_names.take(pa.array(rng.integers(0, len(first_names), n)))
+    last = last_names.take(pa.array(rng.integers(0, len(last_names), n)))
+    name = pc.binary_join_element_wise(first, last, " ")
+    salary = pa.array(np.round(rng.uniform(30_000, 150_000, n), 2))
+    days = np.datetime64(first_day, "D") + rng.integers(0, span_days + 1, n)
+    salary_date = pa.array(days, pa.date32())
+    return pa.RecordBatch.from_arrays([empid, name, salary, salary_date], schema=EMPLOYEE_SCHEMA)
+
+def generate_faker_batch(fake, start_id, end_id):
+    """Build rows [start_id, end_id) one Faker call at a time."""
+    records = []
+    for eid in range(start_id, end_id):
+        records.append({
+            "empid": eid,
+            "name": fake.name(),
+            "salary": round(random.uniform(30_000, 150_000), 2),
+            "salary_date": fake.date_between(start_date='-1y', end_date='today')
+        })
+    return pa.RecordBatch.from_pylist(records, schema=EMPLOYEE_SCHEMA)
+
+# ------------------ Shared-memory chunk transport ------------------
+# Each chunk is written once as an Arrow IPC stream into a shared-memory segment.
+# Only a small (name, size, producer_id) handle goes through q_csv/q_parquet; both
+# writers map the same segment and hand the name back on the producer's release
+# queue. The producer unlinks a segment once every writer has released it and never
+# keeps more than QUEUE_MAX_CHUNKS segments alive; a writer's mapping itself goes
+# away when Arrow drops its last reference to the batch.
+NUM_CONSUMERS = 2   # csv writer + parquet writer
+
+def publish_batch(batch, producer_id):
+    """Copy batch into a new shared-memory segment and return (segment, handle)."""
+    mock = pa.MockOutputStream()
+    with pa.ipc.new_stream(mock, batch.schema) as w:
+        w.write_batch(batch)
+    size = mock.size()
+
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    sink = pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf))
+    with pa.ipc.new_stream(sink, batch.schema) as w:
+        w.write_batch(batch)
+    sink = None
+    return shm, (shm.name, size, producer_id)
+
+def _shared_buffer(shm, size):
+    # wrap the mapping without holding a memoryview export; base=shm keeps the mapping
+    # open for as long as Arrow (e.g. a writer that retains its last batch) references it
+    view = ctypes.c_char.from_buffer(shm.buf)
+    address = ctypes.addressof(view)
+    del view
+    return pa.foreign_buffer(address, size, base=shm)
+
+def consume_batch(handle, release_queues, fn):
+    """Map the segment behind handle, call fn(batch) on it, then release it."""
+    name, size, producer_id = handle
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        reader = pa.ipc.open_stream(_shared_buffer(shm, size))
+        fn(reader.read_next_batch())
+    finally:
+        release_queues[producer_id].put(name)
+
+class Aborted(Exception):
+    """Another process of the run failed; a producer stops instead of waiting on its writers."""
+
+
+def _put(q, item, abort=None):
+    """q.put that raises Aborted once abort is set, e.g. when the writer behind a full queue died."""
+    while True:
+        try:
+            q.put(item, timeout=ABORT_POLL_S)
+            return
+        except queue.Full:
+            if abort is not None and abort.is_set():
+                raise Aborted()
+
+def _reclaim(q_release, outstanding, abort=None):
+    while True:
+        try:
+            name = q_release.get(timeout=ABORT_POLL_S)
+            break
+        except queue.Empty:
+            if abort is not None and abort.is_set():
+                raise Aborted()
+    entry = outstanding[name]
+    entry[1] -= 1
+    if entry[1] == 0:
+        entry[0].close()
+        entry[0].unlink()
+        del outstanding[name]
+
+def generate_worker(start_id, end_id, q_csv, q_parquet, chunk_rows, mode=GENERATOR_MODE,
+                    producer_id=0, q_release=None, q_metrics=None, shard_starts=None, abort=None):
+    """
+    Generate [start_id, end_id) in chunks. When sharded, q_csv/q_parquet are lists of
+    per-shard queues and shard_starts the first empid of each shard; chunks are cut at
+    shard boundaries and routed to the shard that owns their id range.
+    If abort (an mp.Event) is set while blocked, the producer frees its segments and returns.
+    """
+    if shard_starts is None:
+        q_csv, q_parquet, shard_starts = [q_csv], [q_parquet], [start_id]
+    stats = StageStats(f"producer-{producer_id}", q_metrics)
     fake = Faker()
-    empid = start_id
-    while empid < end_id:
-        chunk_end = min(empid + chunk_rows, end_id)
-        records = []
-        for eid in range(empid, chunk_end):
-            records.append({
-                "empid": eid,
-                "name": fake.name(),
-                "salary": round(random.uniform(30_000, 150_000), 2),
-                "salary_date": fake.date_between(start_date='-1y', end_date='today')
-            })
-        
-        q_csv.put(records)
-        q_parquet.put(records)
-        empid = chunk_end
-    return
-
-def csv_writer(q_csv, filename, num_generators):
-    print("CSV writer started")
-    header_written = False
-    finished_count = 0
-    with open(filename, "w", newline="", encoding="utf-8") as f:
-        while True:
-            chunk = q_csv.get()
-            if chunk is None:
-                finished_count += 1
-                if finished_count >= num_generators: 
-                    break
+    outstanding = {}  # segment name -> [SharedMemory, releases still expected]
+
+    try:
+        if mode == "columnar":
+            rng = np.random.default_rng()
+            first_names, last_names = build_name_pools(fake)
+
+        empid = start_id
+        while empid < end_id:
+            shard = bisect.bisect_right(shard_starts, empid) - 1
+            next_shard = shard_starts[shard + 1] if shard + 1 < len(shard_starts) else end_id
+            chunk_end = min(empid + chunk_rows, end_id, next_shard)
+            with stats.timed("gen_s"):
+                if mode == "columnar":
+                    batch = generate_batch(empid, chunk_end, rng, first_names, last_names)
                 else:
-                    continue
-            df = pd.DataFrame(chunk)
-            df.to_csv(f, index=False, header=not header_written)
-            header_written = True
+                    batch = generate_faker_batch(fake, empid, chunk_end)
+
+            # back-pressure on live segments, not on queue slots
+            with stats.timed("backpressure_s"):
+                while len(outstanding) >= QUEUE_MAX_CHUNKS:
+                    _reclaim(q_release, outstanding, abort)
+            with stats.timed("publish_s"):
+                shm, handle = publish_batch(batch, producer_id)
+            outstanding[shm.name] = [shm, NUM_CONSUMERS]
+            with stats.timed("put_s"):
+                _put(q_csv[shard], handle, abort)
+                _put(q_parquet[shard], handle, abort)
+            stats.add("rows", chunk_end - empid)
+            stats.add("batches")
+            stats.tick()
+            empid = chunk_end
+
+        with stats.timed("backpressure_s"):
+            while outstanding:
+                _reclaim(q_release, outstanding, abort)
+    except Aborted:
+        for shm, _ in outstanding.values():
+            shm.close()
+            shm.unlink()
+        print(f"Producer {producer_id} stopped: a writer failed")
+        return
+    stats.close()
+
+# ------------------ CSV output ------------------
+# Chunks are encoded with pyarrow.csv.write_csv (and compressed) on a small thread
+# pool; the writer appends the results in submission order. Each compressed chunk
+# is a complete gzip member / zstd frame, and concatenated members decode as one
+# stream with gzip, zstd and pyarrow.CompressedInputStream alike.
+def encode_csv(batch, include_header=False, compression=None, compression_level=None):
+    """Encode batch as CSV bytes, optionally as one compressed gzip member / zstd frame."""
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(batch, sink, pa_csv.WriteOptions(include_header=include_header))
+    buf = sink.getvalue()
+    if compression:
+        buf = pa.Codec(compression, compression_level).compress(buf, asbytes=False)
+    return buf
+
+def csv_writer(q_csv, filename, num_generators, release_queues, q_metrics=None,
+               compression=CSV_COMPRESSION, encoder_threads=CSV_ENCODER_THREADS, shard=None, q_results=None):
+    print("CSV writer started")
+    stats = StageStats("csv-writer" if shard is None else f"csv-writer-{shard}", q_metrics)
+    encoder_threads = max(1, encoder_threads)
+    pending = deque()  # encode futures, oldest first
+
+    def encode(batch):
+        start = time.perf_counter()
+        buf = encode_csv(batch, False, compression, CSV_COMPRESSION_LEVEL)
+        return buf, time.perf_counter() - start
+
+    def write_ready(limit):
+        while len(pending) > limit:
+            buf, seconds = pending.popleft().result()
+            stats.add("encode_s", seconds)  # summed over the encoder threads
+            f.write(buf)
+
+    def submit(batch):
+        pending.append(pool.submit(encode, batch))
+        write_ready(2 * encoder_threads)  # bounds the chunks held in memory
+
+    f = TimedFile(open(filename, "wb"), stats)
+    try:
+        with ThreadPoolExecutor(max_workers=encoder_threads) as pool:
+            f.write(encode_csv(EMPLOYEE_SCHEMA.empty_table(), True, compression, CSV_COMPRESSION_LEVEL))
+            _drain(q_csv, stats.counted(submit), num_generators, release_queues, stats)
+            write_ready(0)
+    finally:
+        f.close()
+    stats.close()
+    if q_results is not None:
+        q_results.put(("csv", shard, [{"path": filename, "rows": int(stats.values["rows"]),
+                                       "bytes": os.path.getsize(filename)}]))
     print("CSV writer finished")
 
-def parquet_writer(q_parquet, filename, num_generators):
+# ------------------ Partitioned dataset output ------------------
+class PartitionedDatasetWriter:
+    """
+    Writes batches into a Hive-partitioned dataset: root/year=YYYY/month=M/<part_name>.parquet.
+    Rows are buffered per partition and flushed sorted by salary, so within each flush the
+    row groups cover disjoint salary ranges and their min/max statistics prune on salary;
+    salary_date is pruned by the year/month directories and each file's date statistics.
+    close() writes _common_metadata and a _metadata summary of every row group, unless
+    write_summary is False (sharded writers share one root; main writes the summary).
+    """
+    def __init__(self, root, schema=EMPLOYEE_SCHEMA, part_name="part-0", compression="snappy",
+                 row_group_rows=DATASET_ROW_GROUP_ROWS, flush_rows=DATASET_FLUSH_ROWS, open_file=None,
+                 write_summary=True):
+        self.root = root
+        self.schema = schema
+        self.part_name = part_name
+        self.compression = compression
+        self.row_group_rows = row_group_rows
+        self.flush_rows = flush_rows
+        self.open_file = open_file  # optional callable(path) -> binary file, e.g. to time the I/O
+        self.write_summary = write_summary
+        self.files = []      # (relative path, rows) of every file written, filled by close()
+        self._buffers = {}   # (year, month) -> [tables, rows]
+        self._writers = {}   # (year, month) -> (relative path, ParquetWriter, file or None)
+
+    def write_batch(self, batch):
+        dates = batch.column("salary_date")
+        keys = pc.add(pc.multiply(pc.year(dates), 100), pc.month(dates))
+        for key in pc.unique(keys).to_pylist():
+            part = pa.Table.from_batches([batch.filter(pc.equal(keys, key))])
+            buffer = self._buffers.setdefault(divmod(key, 100), [[], 0])
+            buffer[0].append(part)
+            buffer[1] += part.num_rows
+            if buffer[1] >= self.flush_rows:
+                self._flush(divmod(key, 100))
+
+    def _flush(self, partition):
+        tables, rows = self._buffers.pop(partition, ([], 0))
+        if not rows:
+            return
+        table = pa.concat_tables(tables).sort_by([("salary", "ascending"), ("salary_date", "ascending")])
+        if partition not in self._writers:
+            year, month = partition
+            relative = f"year={year}/month={month}/{self.part_name}.parquet"
+            os.makedirs(os.path.join(self.root, f"year={year}", f"month={month}"), exist_ok=True)
+            path = os.path.join(self.root, relative)
+            f = self.open_file(path) if self.open_file else None
+            writer = pq.ParquetWriter(f or path, self.schema, compression=self.compression)
+            self._writers[partition] = (relative, writer, f)
+        self._writers[partition][1].write_table(table, row_group_size=self.row_group_rows)
+
+    def close(self):
+        for partition in list(self._buffers):
+            self._flush(partition)
+        metadatas = []
+        for relative, writer, f in self._writers.values():
+            writer.close()
+            if f is not None:
+                f.close()
+            metadata = writer.writer.metadata
+            metadata.set_file_path(relative)
+            metadatas.append(metadata)
+            self.files.append((relative, metadata.num_rows))
+        if self.write_summary:
+            write_dataset_summary(self.root, self.schema, metadatas)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def write_dataset_summary(root, schema, metadatas):
+    """Write root/_common_metadata and root/_metadata from footers whose file paths are set relative to root."""
+    pq.write_metadata(schema, os.path.join(root, "_common_metadata"))
+    if metadatas:
+        summary = metadatas[0]
+        for metadata in metadatas[1:]:
+            summary.append_row_groups(metadata)
+        summary.write_metadata_file(os.path.join(root, "_metadata"))
+
+
+def parquet_writer(q_parquet, filename, num_generators, release_queues, s3_target=None, output=PARQUET_OUTPUT,
+                   q_metrics=None, shard=None, q_results=None):
     print("Parquet writer started")
-    writer = None
+    stats = StageStats("parquet-writer" if shard is None else f"parquet-writer-{shard}", q_metrics)
+    if output == "dataset":
+        with PartitionedDatasetWriter(filename, part_name="part-0" if shard is None else f"part-{shard:05d}",
+                                      open_file=lambda path: TimedFile(open(path, "wb"), stats),
+                                      write_summary=shard is None) as writer:
+            _drain(q_parquet, stats.counted(writer.write_batch), num_generators, release_queues, stats)
+        files = [{"path": os.path.join(filename, relative), "rows": rows,
+                  "bytes": os.path.getsize(os.path.join(filename, relative))} for relative, rows in writer.files]
+    elif s3_target:
+        # stream row groups to S3 as multipart parts instead of writing a local file
+        from upload_file import MultipartUploadSink
+        bucket_name, s3_key = s3_target
+        with MultipartUploadSink(bucket_name, s3_key) as sink, \
+                pq.ParquetWriter(TimedFile(sink, stats), EMPLOYEE_SCHEMA, compression="snappy") as writer:
+            _drain(q_parquet, stats.counted(writer.write_batch), num_generators, release_queues, stats)
+        files = [{"path": f"s3://{bucket_name}/{s3_key}", "rows": int(stats.values["rows"]),
+                  "bytes": int(stats.values["bytes"])}]
+    else:
+        f = TimedFile(open(filename, "wb"), stats)
+        try:
+            with pq.ParquetWriter(f, EMPLOYEE_SCHEMA, compression="snappy") as writer:
+                _drain(q_parquet, stats.counted(writer.write_batch), num_generators, release_queues, stats)
+        finally:
+            f.close()
+        files = [{"path": filename, "rows": int(stats.values["rows"]), "bytes": os.path.getsize(filename)}]
+    stats.close()
+    if q_results is not None:
+        q_results.put(("parquet", shard, files))
+    print("Parquet writer finished")
+
+def run_writer(abort, writer, *args):
+    """Process target for a writer: sets abort if it fails, so producers stop waiting on it."""
+    try:
+        writer(*args)
+    except BaseException:
+        abort.set()
+        raise
+
+def _drain(q, write, num_generators, release_queues, stats):
     finished_count = 0
     while True:
-        chunk = q_parquet.get()
-        if chunk is None:
+        with stats.timed("get_s"):
+            handle = q.get()
+        if handle is None:
             finished_count += 1
             if finished_count >= num_generators:
                 break
             else:
                 continue
+        consume_batch(handle, release_queues, write)
+        stats.tick()
 
-        df = pd.DataFrame(chunk)
-        df["salary_date"] = pd.to_datetime(df["salary_date"])
-        table = pa.Table.from_pandas(df, preserve_index=False)
-        if writer is None:
-            writer = pq.ParquetWriter(filename, table.schema, compression="snappy")
-        writer.write_table(table)
-    if writer:
-        writer.close()
-    print("Parquet writer finished")
 
 
+# ------------------ Sharding ------------------
+def calibrate(mode=GENERATOR_MODE, rows=GEN_CHUNK_ROWS, compression=CSV_COMPRESSION):
+    """Measure single-core rows/s of generating, CSV-encoding and Parquet-encoding one chunk."""
+    fake = Faker()
+    if mode == "columnar":
+        rng = np.random.default_rng()
+        first_names, last_names = build_name_pools(fake)
+        generate = lambda: generate_batch(1, rows + 1, rng, first_names, last_names)
+    else:
+        rows = min(rows, 2_000)  # faker is slow; a small sample gives the rate
+        generate = lambda: generate_faker_batch(fake, 1, rows + 1)
+
+    def parquet_encode(batch):
+        with pq.ParquetWriter(pa.BufferOutputStream(), EMPLOYEE_SCHEMA, compression="snappy") as writer:
+            writer.write_batch(batch)
+
+    def best_rate(fn, *args):
+        timings = []
+        for _ in range(2):  # the first run pays one-off warm-up costs
+            start = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - start)
+        return rows / max(min(timings), 1e-9)
 
-def main():
+    batch = generate()
+    return {
+        "generate": best_rate(generate),
+        "csv": best_rate(encode_csv, batch, False, compression, CSV_COMPRESSION_LEVEL),
+        "parquet": best_rate(parquet_encode, batch),
+    }
+
+def plan_workers(cores, rates, num_generators=None):
+    """
+    Split cores between producers and writers (the same number per format) so that
+    generation keeps pace with the slower encoder. Returns (producers, writers per format).
+    """
+    encode_rate = min(rates["csv"], rates["parquet"])
+    throughput = cores / (1 / rates["generate"] + 2 / encode_rate)  # rows/s with every core busy
+    producers = num_generators or max(1, round(throughput / rates["generate"]))
+    writers = max(1, (cores - producers) // 2)
+    return producers, writers
+
+def write_manifest(path, results, **info):
+    """Write the part files reported by the writers, ordered by shard, as JSON."""
+    manifest = {"created": datetime.datetime.now().isoformat(timespec="seconds"), **info, "csv": [], "parquet": []}
+    for fmt, shard, files in sorted(results, key=lambda r: (r[0], r[1])):
+        for entry in files:
+            manifest[fmt].append({"shard": shard, **entry})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _check(producers, writers, abort):
+    """Fail the run if a process exited with an error or a writer reported a failure."""
+    if abort.is_set() or any(p.exitcode not in (None, 0) for p in producers + writers):
+        _fail(producers, writers, abort)
+
+def _fail(producers, writers, abort):
+    abort.set()
+    # producers stop within a chunk and ABORT_POLL_S once abort is set, and free their segments
+    # on the way out; terminating one instead would leak them. Writers may wait on get() forever.
+    for p in producers:
+        p.join(timeout=ABORT_PRODUCER_WAIT_S)
+    processes = producers + writers
+    for p in processes:
+        if p.is_alive():
+            p.terminate()
+        p.join()
+    failed = ", ".join(f"{p.name} (exit code {p.exitcode})" for p in processes if p.exitcode not in (None, 0, -15))
+    raise RuntimeError(f"Run aborted, failed process(es): {failed or 'unknown'}")
+
+def _wait(waiting_for, producers, writers, abort):
+    """Join waiting_for while watching every process of the run; see _check."""
+    for p in waiting_for:
+        while p.is_alive():
+            p.join(timeout=ABORT_POLL_S)
+            _check(producers, writers, abort)
+        _check(producers, writers, abort)
+
+def main(s3_target=None, parquet_output=PARQUET_OUTPUT, num_rows=None, num_generators=None, num_writers=None):
+    """
+    Generate num_rows (default NUM_ROWS) employees into OUTPUT_CSV and OUTPUT_PARQUET
+    using num_generators producer processes (default: one per spare core).
+    With s3_target=(bucket_name, s3_key) the Parquet output is streamed to S3
+    while it is generated and no local Parquet file is written.
+    parquet_output="dataset" writes a year/month partitioned OUTPUT_DATASET instead.
+    num_writers (default NUM_WRITERS) > 1 runs that many writers per format, each
+    owning an equal, contiguous empid range and writing its own part file under
+    OUTPUT_SHARDS, with a manifest.json listing the parts; "auto" picks producer and
+    writer counts from a calibration run.
+    """
+    if s3_target and parquet_output == "dataset":
+        raise ValueError("Streaming to S3 supports a single Parquet file, not a partitioned dataset")
     start_time = time.time()  # start time
 
-    cpu_cores = mp.cpu_count() - 1
-    print(f"Detected CPU cores: {mp.cpu_count()}, using {cpu_cores} generators")
+    num_rows = num_rows or NUM_ROWS
+    num_writers = num_writers or NUM_WRITERS
+    if num_writers == "auto":
+        rates = calibrate(GENERATOR_MODE)
+        cpu_cores, num_writers = plan_workers(mp.cpu_count(), rates, num_generators)
+        print("Calibrated rows/s per core: " + ", ".join(f"{k} {v:,.0f}" for k, v in rates.items()))
+    else:
+        cpu_cores = num_generators or max(1, mp.cpu_count() - 1)
+        num_writers = max(1, num_writers)
+    sharded = num_writers > 1
+    abort = mp.Event()  # set by a failing writer (or by main) so no process waits forever
+    print(f"Detected CPU cores: {mp.cpu_count()}, using {cpu_cores} generators and {num_writers} writer(s) per format")
+
+    base = num_rows // cpu_cores  #90909.0909 ~ 90909
+    extras = num_rows % cpu_cores #1
+
+    # shard k owns empids [shard_starts[k], shard_starts[k + 1]); producers route each chunk by its ids
+    shard_starts = [1 + k * num_rows // num_writers for k in range(num_writers)]
+    q_csvs = [mp.Queue(maxsize=QUEUE_MAX_CHUNKS) for _ in range(num_writers)] #maxsize prevents memory from growing too large.
+    q_parquets = [mp.Queue(maxsize=QUEUE_MAX_CHUNKS) for _ in range(num_writers)]
+    release_queues = [mp.Queue() for _ in range(cpu_cores)] # writers hand shared-memory segments back to their producer
+    q_results = mp.Queue() if sharded else None
+    q_metrics = mp.Queue() if TELEMETRY else None
+    if TELEMETRY:
+        queues = {"q_csv": q_csvs[0], "q_parquet": q_parquets[0]} if not sharded else {
+            **{f"q_csv[{k}]": q for k, q in enumerate(q_csvs)},
+            **{f"q_parquet[{k}]": q for k, q in enumerate(q_parquets)},
+        }
+        collector = MetricsCollector(q_metrics, queues, METRICS_FILE)
+        collector.start()
 
-    base = NUM_ROWS // cpu_cores  #90909.0909 ~ 90909
-    extras = NUM_ROWS % cpu_cores #1
+    if os.name == "posix":
+        # share one tracker across forked children so segments are registered/unregistered in one place
+        resource_tracker.ensure_running()
 
-    q_csv = mp.Queue(maxsize=QUEUE_MAX_CHUNKS) #maxsize prevents memory from growing too large.
-    q_parquet = mp.Queue(maxsize=QUEUE_MAX_CHUNKS)
+    """choose targets"""
+    csv_suffix = CSV_SUFFIXES[CSV_COMPRESSION]
+    if not sharded:
+        csv_targets = [OUTPUT_CSV + csv_suffix]
+        parquet_root = OUTPUT_DATASET if parquet_output == "dataset" else OUTPUT_PARQUET
+        parquet_targets = [parquet_root]
+        s3_targets = [s3_target]
+    else:
+        os.makedirs(os.path.join(OUTPUT_SHARDS, "csv"), exist_ok=True)
+        parquet_root = os.path.join(OUTPUT_SHARDS, "parquet")
+        os.makedirs(parquet_root, exist_ok=True)
+        csv_targets = [os.path.join(OUTPUT_SHARDS, "csv", f"part-{k:05d}.csv{csv_suffix}") for k in range(num_writers)]
+        parquet_targets = [parquet_root if parquet_output == "dataset" else os.path.join(parquet_root, f"part-{k:05d}.parquet")
+                           for k in range(num_writers)]
+        s3_targets = [(s3_target[0], f"{os.path.splitext(s3_target[1])[0]}/part-{k:05d}.parquet") if s3_target else None
+                      for k in range(num_writers)]
 
     """start writers"""
-    p_csv = mp.Process(target=csv_writer, args=(q_csv, OUTPUT_CSV, cpu_cores), daemon=False)
-    p_parquet = mp.Process(target=parquet_writer, args=(q_parquet, OUTPUT_PARQUET, cpu_cores), daemon=False)
-    p_csv.start()
-    p_parquet.start()
+    writers = []
+    for k in range(num_writers):
+        shard = k if sharded else None
+        writers.append(mp.Process(target=run_writer, args=(abort, csv_writer, q_csvs[k], csv_targets[k], cpu_cores, release_queues, q_metrics, CSV_COMPRESSION, CSV_ENCODER_THREADS, shard, q_results), daemon=False))
+        writers.append(mp.Process(target=run_writer, args=(abort, parquet_writer, q_parquets[k], parquet_targets[k], cpu_cores, release_queues, s3_targets[k], parquet_output, q_metrics, shard, q_results), daemon=False))
+    for w in writers:
+        w.start()
 
     """making the range"""
     producers = []
@@ -103,27 +565,58 @@ def main():
         start_id = next_id #1 # 90910
         end_id = start_id + this_count #1 + 90909 # 90910 + 90909
         next_id = end_id #90910 # 181819
-        p = mp.Process(target=generate_worker, args=(start_id, end_id, q_csv, q_parquet, GEN_CHUNK_ROWS))
+        p = mp.Process(target=generate_worker, args=(start_id, end_id, q_csvs, q_parquets, GEN_CHUNK_ROWS, GENERATOR_MODE, i, release_queues[i], q_metrics, shard_starts, abort))
         p.start()
         producers.append(p)
 
     """ wait for generators to finish"""
-    for p in producers:
-        p.join()
+    _wait(producers, producers, writers, abort)
 
     """tell writers that production finished """
-    for _ in range(cpu_cores):
-        q_csv.put(None)
-        q_parquet.put(None)
+    try:
+        for _ in range(cpu_cores):
+            for q in q_csvs + q_parquets:
+                _put(q, None, abort)
+    except Aborted:
+        _fail(producers, writers, abort)
+
+    """collect part files and wait for writers"""
+    results = []
+    while sharded and len(results) < len(writers):
+        try:
+            results.append(q_results.get(timeout=ABORT_POLL_S))
+        except queue.Empty:
+            _check(producers, writers, abort)
+    _wait(writers, producers, writers, abort)
 
-    """wait for writers"""
-    p_csv.join()
-    p_parquet.join()
+    if sharded:
+        if parquet_output == "dataset":
+            metadatas = []
+            for _, _, files in sorted(r for r in results if r[0] == "parquet"):
+                for entry in files:
+                    metadata = pq.read_metadata(entry["path"])
+                    metadata.set_file_path(os.path.relpath(entry["path"], parquet_root).replace(os.sep, "/"))
+                    metadatas.append(metadata)
+            write_dataset_summary(parquet_root, EMPLOYEE_SCHEMA, metadatas)
+        # file parts map one-to-one to shards, so record each part's empid range
+        bounds = shard_starts + [num_rows + 1]
+        for fmt, k, files in results:
+            if fmt == "csv" or parquet_output != "dataset":
+                files[0]["empid_range"] = [bounds[k], bounds[k + 1]]
+        write_manifest(os.path.join(OUTPUT_SHARDS, "manifest.json"), results, num_rows=num_rows,
+                       producers=cpu_cores, writers_per_format=num_writers)
+        print(f"Wrote {num_writers} part files per format and {OUTPUT_SHARDS}/manifest.json")
 
     end_time = time.time()  # record end time
     elapsed = end_time - start_time
     print(f"\nAll tasks completed successfully in {elapsed:.2f} seconds.")
-    return OUTPUT_PARQUET
+    if TELEMETRY:
+        print_report(collector.stop())
+    if s3_target:
+        if sharded:
+            return f"s3://{s3_target[0]}/{os.path.splitext(s3_target[1])[0]}/"
+        return f"s3://{s3_target[0]}/{s3_target[1]}"
+    return parquet_root
 
 
 if __name__ == "__main__":
@@ -3,73 +3,112 @@ import random
 from dataclasses import dataclass
 from datetime import date, datetime
 import csv
+import threading
+from itertools import chain
 from multiprocessing import Pool, cpu_count
-from typing import List
+from typing import Iterable, Iterator, List
 import logging
 
 logging.basicConfig(filename='app.log', level=logging.INFO, filemode='a')
 
 logger = logging.getLogger("GenerateData")
-@dataclass
+
+CHUNK_SIZE = 10_000        # rows generated per worker task
+CHUNKS_IN_FLIGHT = 2       # chunks per worker queued or waiting to be consumed
+
+@dataclass(slots=True)
 class Employee:
     empid: int
     name: str
     salary: float
     salary_date: date
 
+# ------------------ Worker side ------------------
+# Module-level so Pool only pickles (start, end) tuples, not GenerateData and its Faker.
+_fake = None
+
+def _init_worker():
+    global _fake
+    _fake = Faker()
+
+def _generate_chunk(start_end):
+    start, end = start_end
+    employees = []
+    for i in range(start, end):
+        empid = i + 1
+        name = _fake.name()
+        salary = round(random.uniform(30_000, 150_000), 2)
+        salary_date = _fake.date_between(start_date='-1y', end_date='today')
+        employees.append(Employee(empid, name, salary, salary_date))
+    return employees
+
 class GenerateData :   
-    def __init__(self, total_records: int = 100000):
+    def __init__(self, total_records: int = 100000, processes: int | None = None):
         #self.employees = []
         self.fake = Faker()
         self.total_records = total_records
+        self.processes = processes  # worker processes, defaults to cpu_count()
 
 
-    #generating for diff chuncks
-    def _generate_chunk(self, start_end):
-        start, end = start_end
-        fake = Faker()
-        employees = []
-        for i in range(start, end):
-            empid = i + 1
-            name = fake.name()
-            salary = round(random.uniform(30_000, 150_000), 2)
-            salary_date = fake.date_between(start_date='-1y', end_date='today')
-            employees.append(Employee(empid, name, salary, salary_date))
-        return employees
-
-    def generate_employee_data(self) -> List[Employee] :
-        num_cores = cpu_count()
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE, ordered: bool = False) -> Iterator[List[Employee]]:
+        """
+        Yield lists of up to chunk_size employees as workers finish them (in empid
+        order with ordered=True). At most CHUNKS_IN_FLIGHT chunks per worker are
+        queued or unconsumed at a time, so memory does not grow with total_records.
+        """
+        num_cores = self.processes or cpu_count()
         logger.info("count %d" ,num_cores)
-        chunk_size = self.total_records // num_cores
+        window = threading.Semaphore(num_cores * CHUNKS_IN_FLIGHT)
+        stopped = False
+
+        def ranges():
+            # runs on the pool's task-feeding thread; blocks until the consumer frees a slot
+            for start in range(0, self.total_records, chunk_size):
+                window.acquire()
+                if stopped:
+                    return
+                yield start, min(start + chunk_size, self.total_records)
 
-        ranges = [(i * chunk_size, (i + 1) * chunk_size if i < num_cores - 1 else self.total_records)
-                  for i in range(num_cores)]
+        with Pool(processes=num_cores, initializer=_init_worker) as pool:  #create a multiprocessing.Pool object with num_cores worker processes.
+            imap = pool.imap if ordered else pool.imap_unordered
+            try:
+                for chunk in imap(_generate_chunk, ranges()):
+                    yield chunk
+                    window.release()
+            finally:
+                # unblock the feeder if the consumer stopped early
+                stopped = True
+                window.release(num_cores * CHUNKS_IN_FLIGHT + 1)
 
-        with Pool(processes=num_cores) as pool:  #create a multiprocessing.Pool object with num_cores worker processes.
-            results = pool.map(self._generate_chunk, ranges) #apply funct to each tuple in ranges, runs parallely distributing work across difeerent workers
-            #resuls is a list of list 
-        # flatten list of lists
-        all_employees = [emp for chunk in results for emp in chunk]
+    def iter_employees(self, ordered: bool = False) -> Iterator[Employee]:
+        return chain.from_iterable(self.iter_chunks(ordered=ordered))
+
+    def generate_employee_data(self) -> List[Employee] :
+        """Materialise every employee in one list; prefer iter_chunks for large totals."""
+        all_employees = list(self.iter_employees(ordered=True))
         print(f"Finished generating {len(all_employees):,} employees.")
         return all_employees
 
     
-    def save_data_to_file(self, filename:str, employees: List[Employee]):
+    def save_data_to_file(self, filename:str, employees: Iterable[Employee]) -> int:
+        """Write employees (a list or a stream such as iter_employees()) to CSV as they arrive."""
+        count = 0
         with open(filename, mode="w", newline='') as file:
             writer = csv.writer(file)
             writer.writerow(["empid", "name", "salary", "salary_date"])
             for emp in employees:
                 writer.writerow([emp.empid, emp.name, emp.salary, emp.salary_date])
-        print("File saved")
+                count += 1
+        print(f"File saved ({count:,} rows)")
+        return count
     
 if __name__ == "__main__":
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     generator = GenerateData(total_records=100)
-    employees = generator.generate_employee_data()
-    # for emp in generator.employees:
+    # for emp in generator.iter_employees():
     #     print(emp)
     filename = f"employees1_{timestamp}.csv"
-    generator.save_data_to_file(filename, employees)
+    generator.save_data_to_file(filename, generator.iter_employees())
     
             
             
\ No newline at end of file
@@ -0,0 +1,201 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+METRICS_INTERVAL = 1.0   # seconds between snapshots sent by each process / queue depth samples
+
+
+# ------------------ Per-process counters ------------------
+class StageStats:
+    """
+    Counters and timers for one pipeline stage (a producer or a writer process).
+    Snapshots go to q_metrics at most every interval seconds plus once at the end;
+    without a queue the counters are still kept but nothing is sent.
+    """
+    def __init__(self, stage, q_metrics=None, interval=METRICS_INTERVAL):
+        self.stage = stage
+        self.q_metrics = q_metrics
+        self.interval = interval
+        self.values = defaultdict(float)
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def add(self, key, amount=1):
+        self.values[key] += amount
+
+    @contextmanager
+    def timed(self, key):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.values[key] += time.perf_counter() - start
+
+    def counted(self, fn):
+        """Wrap a batch consumer so its time goes to write_s and its rows/batches are counted."""
+        def wrapper(batch):
+            with self.timed("write_s"):
+                fn(batch)
+            self.values["rows"] += batch.num_rows
+            self.values["batches"] += 1
+        return wrapper
+
+    def snapshot(self, final=False):
+        return {"stage": self.stage, "time": time.time(), "elapsed_s": time.perf_counter() - self.started,
+                "final": final, **self.values}
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.q_metrics is not None and now - self._last_report >= self.interval:
+            self._last_report = now
+            self.q_metrics.put(self.snapshot())
+
+    def close(self):
+        if self.q_metrics is not None:
+            self.q_metrics.put(self.snapshot(final=True))
+
+
+class TimedFile:
+    """Binary file wrapper that records time spent in write/flush/close as io_s and bytes written."""
+    def __init__(self, raw, stats):
+        self._raw = raw
+        self._stats = stats
+
+    def write(self, data):
+        with self._stats.timed("io_s"):
+            written = self._raw.write(data)
+        self._stats.add("bytes", len(data))
+        return written
+
+    def flush(self):
+        with self._stats.timed("io_s"):
+            self._raw.flush()
+
+    def close(self):
+        with self._stats.timed("io_s"):
+            self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+# ------------------ Collector (main process) ------------------
+class MetricsCollector(threading.Thread):
+    """
+    Runs in the parent: gathers snapshots from q_metrics, samples the depth of the
+    given queues, optionally appends everything to a JSONL file, and builds the
+    final per-stage report once the pipeline has finished.
+    """
+    def __init__(self, q_metrics, queues, path=None, interval=METRICS_INTERVAL):
+        super().__init__(daemon=True)
+        self.q_metrics = q_metrics
+        self.queues = queues
+        self.path = path
+        self.interval = interval
+        self.stages = {}                       # stage -> latest snapshot
+        self.depths = defaultdict(list)        # queue name -> samples
+        self._stop_event = threading.Event()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def _emit(self, record):
+        if self._file:
+            self._file.write(json.dumps(record) + "\n")
+
+    def _receive(self, timeout):
+        try:
+            snapshot = self.q_metrics.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        self.stages[snapshot["stage"]] = snapshot
+        self._emit(snapshot)
+        return True
+
+    def _sample_depths(self):
+        depths = {}
+        for name, q in self.queues.items():
+            try:
+                depths[name] = q.qsize()
+            except NotImplementedError:   # macOS has no sem_getvalue
+                continue
+            self.depths[name].append(depths[name])
+        if depths:
+            self._emit({"stage": "queues", "time": time.time(), **depths})
+
+    def run(self):
+        next_sample = time.perf_counter()
+        while not self._stop_event.is_set():
+            if time.perf_counter() >= next_sample:
+                self._sample_depths()
+                next_sample += self.interval
+            self._receive(timeout=min(self.interval, 0.1))
+
+    def stop(self):
+        """Stop sampling, drain the snapshots still in flight and return the summary."""
+        self._stop_event.set()
+        self.join()
+        while self._receive(timeout=0.1):
+            pass
+        summary = self.summary()
+        self._emit({"stage": "summary", "time": time.time(), **summary})
+        if self._file:
+            self._file.close()
+        return summary
+
+    def summary(self):
+        stages = {}
+        for stage, s in sorted(self.stages.items()):
+            elapsed = s["elapsed_s"] or 1e-9
+            entry = {"rows": int(s.get("rows", 0)), "elapsed_s": round(elapsed, 3),
+                     "rows_per_s": round(s.get("rows", 0) / elapsed, 1)}
+            for key in ("gen_s", "publish_s", "backpressure_s", "put_s", "get_s", "io_s"):
+                if key in s:
+                    entry[key] = round(s[key], 3)
+            if "encode_s" in s:
+                # measured by the stage itself (e.g. on encoder threads, where write_s is only submission)
+                entry["encode_s"] = round(s["encode_s"], 3)
+            elif "write_s" in s:
+                # time inside write_batch that was not spent in the sink is encoding
+                entry["encode_s"] = round(s["write_s"] - s.get("io_s", 0), 3)
+            if "bytes" in s:
+                entry["bytes"] = int(s["bytes"])
+            stages[stage] = entry
+        depths = {name: {"mean": round(sum(v) / len(v), 2), "max": max(v), "samples": len(v)}
+                  for name, v in self.depths.items() if v}
+        return {"stages": stages, "queue_depth": depths}
+
+
+def print_report(summary):
+    print("\nPipeline telemetry:")
+    for stage, s in summary["stages"].items():
+        parts = [f"{s['rows']:>10,} rows", f"{s['rows_per_s']:>12,.0f} rows/s"]
+        if "gen_s" in s:
+            parts.append(f"generate {s['gen_s']:.2f}s  publish {s['publish_s']:.2f}s  "
+                         f"blocked {s.get('backpressure_s', 0) + s.get('put_s', 0):.2f}s")
+        if "get_s" in s:
+            parts.append(f"blocked on get {s['get_s']:.2f}s  encode {s.get('encode_s', 0):.2f}s  "
+                         f"I/O {s.get('io_s', 0):.2f}s  {s.get('bytes', 0) / 1e6:,.1f} MB")
+        print(f"  {stage:<16}" + "  ".join(parts))
+    for name, d in summary["queue_depth"].items():
+        print(f"  {name:<16}depth mean {d['mean']}  max {d['max']}  ({d['samples']} samples)")
+    hint = bottleneck_hint(summary)
+    if hint:
+        print(f"  -> {hint}")
+
+
+def bottleneck_hint(summary):
+    """Name the stage that waited least relative to its runtime."""
+    writers = {k: v for k, v in summary["stages"].items() if "get_s" in v}
+    producers = [v for v in summary["stages"].values() if "gen_s" in v]
+    if not writers or not producers:
+        return None
+    # a writer that is rarely blocked on get() is saturated; producers blocked on put/back-pressure confirm it
+    busiest, stats = min(writers.items(), key=lambda kv: kv[1]["get_s"] / kv[1]["elapsed_s"])
+    producer_blocked = sum(p.get("backpressure_s", 0) + p.get("put_s", 0) for p in producers) / \
+        sum(p["elapsed_s"] for p in producers)
+    if stats["get_s"] / stats["elapsed_s"] < 0.2 and producer_blocked > 0.2:
+        side = "I/O" if stats.get("io_s", 0) > stats.get("encode_s", 0) else "encoding"
+        return f"{busiest} is the bottleneck (mostly {side}); more producers will not help"
+    return "writers are waiting on producers; more generator cores should help"
@@ -0,0 +1,24 @@
+import configparser
+import os
+from sqlalchemy import func, select
+from models import Employee
+from parquet_loader import ParquetImporter
+
+LEGACY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "New folder", "employee_data1_1.parquet")
+
+
+def test_loads_legacy_string_salary_date(tmp_path):
+    # written by the original convert_to_parquet (read_csv without parse_dates): salary_date is a string
+    config = configparser.ConfigParser()
+    config["RDS"] = {"url": f"sqlite:///{tmp_path / 'emp.db'}"}
+    importer = ParquetImporter(config["RDS"])
+
+    assert importer.import_data(LEGACY_FILE) == 100
+    with importer.handler.engine.connect() as conn:
+        count, first, last = conn.execute(
+            select(func.count(), func.min(Employee.salary_date), func.max(Employee.salary_date))
+        ).one()
+    assert count == 100
+    assert str(first) == "2024-10-17" and str(last) == "2025-09-27"
+    # a rerun finds every row group already loaded
+    assert importer.import_data(LEGACY_FILE) == 0
@@ -0,0 +1,51 @@
+import configparser
+import os
+from datetime import datetime
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import update
+from models import Employee
+import rds_export
+from rds_export import IncrementalExporter
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    config = configparser.ConfigParser()
+    config["RDS"] = {"url": f"sqlite:///{tmp_path / 'emp.db'}"}
+    exporter = IncrementalExporter(config["RDS"], output_dir=str(tmp_path / "exports"),
+                                   state_path=str(tmp_path / "watermark.json"), lag=0)
+    exporter.handler.insert_sample_records(3000, progress=False)
+    return exporter
+
+
+def test_back_to_back_exports_keep_every_file(exporter):
+    first, rows = exporter.export()
+    assert rows == 3000
+    with exporter.handler.engine.begin() as conn:
+        conn.execute(update(Employee).where(Employee.id.in_([5, 7])).values(salary=1.0))
+    second, rows = exporter.export()  # same second as the first run
+    assert rows == 2 and second != first
+    assert pq.read_table(first).num_rows == 3000
+    assert sorted(pq.read_table(second)["id"].to_pylist()) == [5, 7]
+    assert exporter.export() == (None, 0)
+
+
+def test_existing_export_is_not_overwritten(exporter, monkeypatch):
+    class FrozenClock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2100, 1, 1)  # every run picks the same file name
+
+        fromisoformat = staticmethod(datetime.fromisoformat)  # plain datetimes for the driver
+
+    monkeypatch.setattr(rds_export, "datetime", FrozenClock)
+    path, _ = exporter.export()
+    with exporter.handler.engine.begin() as conn:
+        conn.execute(update(Employee).where(Employee.id == 5).values(salary=1.0))
+    watermark = exporter.load_watermark()
+    with pytest.raises(FileExistsError):
+        exporter.export()
+    assert pq.read_table(path).num_rows == 3000
+    assert exporter.load_watermark() == watermark  # the change is left for the next run
+    assert not [name for name in os.listdir(exporter.output_dir) if name.endswith(".tmp")]
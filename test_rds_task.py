@@ -0,0 +1,57 @@
+import configparser
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from models import Employee
+from rds_task import RDSTableHandler
+
+OLD_TABLE = (
+    f"CREATE TABLE {Employee.__tablename__} "
+    "(id INTEGER PRIMARY KEY, name VARCHAR(100), salary FLOAT, salary_date DATE)"
+)
+
+
+@pytest.fixture
+def rds_config(tmp_path):
+    config = configparser.ConfigParser()
+    config["RDS"] = {"url": f"sqlite:///{tmp_path / 'emp.db'}"}
+    return config["RDS"]
+
+
+def _index_names(engine):
+    with engine.connect() as conn:
+        return set(conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t"
+        ), {"t": Employee.__tablename__}).scalars())
+
+
+def test_new_table_is_created_complete(rds_config):
+    handler = RDSTableHandler(rds_config)
+    assert {index.name for index in Employee.__table__.indexes} <= _index_names(handler.engine)
+    assert handler.supports_fuzzy_search is False
+
+
+def test_indexes_are_added_only_by_migrate(rds_config):
+    with create_engine(rds_config["url"]).begin() as conn:
+        conn.execute(text(OLD_TABLE))
+    handler = RDSTableHandler(rds_config)
+    assert _index_names(handler.engine) == set()  # constructing a handler runs no DDL on an existing table
+
+    handler.migrate()
+    assert {index.name for index in Employee.__table__.indexes} <= _index_names(handler.engine)
+    handler.migrate()  # idempotent
+
+
+def test_updated_at_is_added_and_backfilled_only_by_migrate(rds_config):
+    with create_engine(rds_config["url"]).begin() as conn:
+        conn.execute(text(OLD_TABLE))
+        conn.execute(text(f"INSERT INTO {Employee.__tablename__} (name, salary) VALUES ('Ann', 1.0)"))
+    handler = RDSTableHandler(rds_config)
+    columns = lambda: {c["name"] for c in inspect(handler.engine).get_columns(Employee.__tablename__)}
+    assert "updated_at" not in columns()
+
+    handler.migrate()
+    assert "updated_at" in columns()
+    with handler.engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {Employee.__tablename__} (name, salary) VALUES ('Bob', 2.0)"))
+        missing = conn.execute(text(f"SELECT count(*) FROM {Employee.__tablename__} WHERE updated_at IS NULL"))
+        assert missing.scalar() == 0  # backfilled, and raw inserts get it from the trigger
@@ -0,0 +1,108 @@
+import datetime
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+from faker import Faker
+from cache import LRUCache
+from conftest import BUCKET
+from s3_reader import S3ParquetReader, average_salary
+from s3_task import build_name_pools, generate_batch
+
+NUM_ROWS = 100_000
+ROW_GROUP_ROWS = 10_000
+
+
+@pytest.fixture(scope="module")
+def employees():
+    """Employees sorted by salary_date, so each row group covers a narrow date range."""
+    first_names, last_names = build_name_pools(Faker(), pool_size=50)
+    batch = generate_batch(1, NUM_ROWS + 1, np.random.default_rng(7), first_names, last_names)
+    return pa.Table.from_batches([batch]).sort_by("salary_date")
+
+
+def _month(table):
+    """[start, end) of the calendar month holding the table's median salary_date."""
+    middle = table["salary_date"][table.num_rows // 2].as_py()
+    start = middle.replace(day=1)
+    return start, (start + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _with_salary_date(table, kind):
+    """salary_date as stored by older writers: timestamp (pandas) or string (CSV without parse_dates)."""
+    index = table.schema.get_field_index("salary_date")
+    dates = table["salary_date"]
+    if kind == "timestamp":
+        # midday, so a date filter must not compare against midnight only
+        dates = pc.add(pc.cast(dates, pa.timestamp("us")), pa.scalar(datetime.timedelta(hours=13)))
+    elif kind == "string":
+        dates = pc.cast(dates, pa.string())
+    return table.set_column(index, "salary_date", dates)
+
+
+def _upload(s3, table, key):
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, row_group_size=ROW_GROUP_ROWS)
+    s3.put_object(Bucket=BUCKET, Key=key, Body=sink.getvalue().to_pybytes())
+
+
+@pytest.mark.parametrize("kind", ["date32", "timestamp", "string"])
+def test_date_filters_prune_row_groups(s3, employees, kind):
+    _upload(s3, _with_salary_date(employees, kind), f"Steven/{kind}/employees.parquet")
+    start, end = _month(employees)
+    in_month = pc.and_(pc.greater_equal(employees["salary_date"], pa.scalar(start)),
+                       pc.less(employees["salary_date"], pa.scalar(end)))
+    expected = employees.filter(in_month)
+
+    reader = S3ParquetReader(BUCKET, s3_client=s3, cache=None)
+    table = reader.read(f"Steven/{kind}/", columns=["empid", "salary"],
+                        filters=[("salary_date", ">=", start), ("salary_date", "<", end)])
+    assert table.column_names == ["empid", "salary"]
+    assert sorted(table["empid"].to_pylist()) == sorted(expected["empid"].to_pylist())
+    assert 0 < reader.row_groups_read < reader.row_groups_total == NUM_ROWS // ROW_GROUP_ROWS
+
+    # the same filter from the command line arrives as strings
+    reader = S3ParquetReader(BUCKET, s3_client=s3, cache=None)
+    table = reader.read(f"Steven/{kind}/", columns=["empid"],
+                        filters=[("salary_date", ">=", start.isoformat()), ("salary_date", "<", end.isoformat())])
+    assert table.num_rows == expected.num_rows
+
+    reader = S3ParquetReader(BUCKET, s3_client=s3, cache=None)
+    assert average_salary(reader, start, end, f"Steven/{kind}/") == pytest.approx(pc.mean(expected["salary"]).as_py())
+    assert reader.row_groups_read < reader.row_groups_total
+
+
+def test_selective_read_transfers_part_of_the_object(s3, employees):
+    _upload(s3, employees, "Steven/single/employees.parquet")
+    size = s3.head_object(Bucket=BUCKET, Key="Steven/single/employees.parquet")["ContentLength"]
+    start, end = _month(employees)
+    reader = S3ParquetReader(BUCKET, s3_client=s3, cache=None)
+    average_salary(reader, start, end, "Steven/single/")
+    assert 0 < reader.bytes_fetched < size / 2
+
+    reader = S3ParquetReader(BUCKET, s3_client=s3, cache=None)
+    assert reader.read("Steven/single/").equals(employees)
+    assert reader.read("Steven/single/", filters=[("empid", "in", [5, 77])])["empid"].to_pylist() in ([5, 77], [77, 5])
+
+
+def test_block_cache_serves_second_read(s3, employees):
+    _upload(s3, employees, "Steven/cached/employees.parquet")
+    start, end = _month(employees)
+    cache = LRUCache(maxsize=4096, ttl=None)
+
+    first = S3ParquetReader(BUCKET, s3_client=s3, cache=cache)
+    expected = average_salary(first, start, end, "Steven/cached/")
+    assert first.bytes_fetched > 0 and first.requests > 0
+    hits = cache.hits
+
+    second = S3ParquetReader(BUCKET, s3_client=s3, cache=cache)
+    assert average_salary(second, start, end, "Steven/cached/") == expected
+    assert second.bytes_fetched == 0 and second.requests == 0
+    assert cache.hits > hits
+
+    # a re-uploaded object has a new ETag, so its old blocks are not reused
+    _upload(s3, employees.slice(0, NUM_ROWS // 2), "Steven/cached/employees.parquet")
+    third = S3ParquetReader(BUCKET, s3_client=s3, cache=cache)
+    assert third.read("Steven/cached/", columns=["empid"]).num_rows == NUM_ROWS // 2
+    assert third.bytes_fetched > 0
@@ -0,0 +1,51 @@
+import os
+import boto3
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import pytest
+import s3_task
+import upload_file
+from conftest import BUCKET
+
+NUM_ROWS = 120_000
+
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(s3_task, "TELEMETRY", False)
+    monkeypatch.setattr(s3_task.mp, "cpu_count", lambda: 3)  # two producers
+    return tmp_path
+
+
+def _shared_segments():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")} if os.path.isdir("/dev/shm") else set()
+
+
+def test_main_streams_parquet_to_s3(s3, run_dir, monkeypatch):
+    # writers are forked and each holds its own copy of the moto backend, so the
+    # writer saves what it uploaded next to the run for the test to inspect
+    complete = upload_file.MultipartUploadSink.close
+
+    def close_and_keep_copy(self):
+        complete(self)
+        body = boto3.client("s3").get_object(Bucket=self.bucket_name, Key=self.s3_key)["Body"].read()
+        (run_dir / "uploaded.parquet").write_bytes(body)
+
+    monkeypatch.setattr(upload_file.MultipartUploadSink, "close", close_and_keep_copy)
+    uri = s3_task.main(s3_target=(BUCKET, "Steven/emp.parquet"), num_rows=NUM_ROWS)
+
+    assert uri == f"s3://{BUCKET}/Steven/emp.parquet"
+    table = pq.read_table(run_dir / "uploaded.parquet")
+    assert table.schema.equals(s3_task.EMPLOYEE_SCHEMA, check_metadata=False)
+    assert sorted(table["empid"].to_pylist()) == list(range(1, NUM_ROWS + 1))
+    assert pa_csv.read_csv(s3_task.OUTPUT_CSV).num_rows == NUM_ROWS
+    assert not os.path.exists(s3_task.OUTPUT_PARQUET)  # streamed, no local copy
+
+
+@pytest.mark.parametrize("num_writers", [1, 2])
+def test_main_aborts_when_writer_fails(s3, run_dir, num_writers):
+    before = _shared_segments()
+    with pytest.raises(RuntimeError, match="failed process"):
+        s3_task.main(s3_target=("no-such-bucket", "Steven/emp.parquet"), num_rows=600_000, num_writers=num_writers)
+    assert _shared_segments() <= before  # producers freed their segments
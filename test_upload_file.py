@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import pytest
+from conftest import BUCKET
+from upload_file import CAS_PREFIX, MANIFEST_PREFIX, PART_SIZE, FileUpload, HashCache, MultipartUploadSink
+
+
+def test_multipart_sink_streams_parts(s3):
+    data = os.urandom(12 * 1024 * 1024)
+    with MultipartUploadSink(BUCKET, "Steven/big.bin", s3_client=s3) as sink:
+        for start in range(0, len(data), 1024 * 1024):
+            sink.write(data[start:start + 1024 * 1024])
+        assert sink.tell() == len(data)
+
+    assert s3.get_object(Bucket=BUCKET, Key="Steven/big.bin")["Body"].read() == data
+    parts = -(-len(data) // PART_SIZE)
+    assert s3.head_object(Bucket=BUCKET, Key="Steven/big.bin")["ETag"].endswith(f'-{parts}"')
+    assert "Uploads" not in s3.list_multipart_uploads(Bucket=BUCKET)
+
+
+def test_multipart_sink_aborts_on_error(s3):
+    with pytest.raises(RuntimeError):
+        with MultipartUploadSink(BUCKET, "Steven/partial.bin", s3_client=s3) as sink:
+            sink.write(os.urandom(PART_SIZE + 1024))  # one part already uploaded
+            raise RuntimeError("producer failed")
+
+    assert "Uploads" not in s3.list_multipart_uploads(Bucket=BUCKET)
+    assert "Contents" not in s3.list_objects_v2(Bucket=BUCKET)
+
+
+# ------------------ Content-addressed sync ------------------
+def _sync_tree(root):
+    (root / "data" / "sub").mkdir(parents=True)
+    (root / "data" / "a.bin").write_bytes(b"same bytes" * 1000)
+    (root / "data" / "sub" / "copy.bin").write_bytes(b"same bytes" * 1000)
+    (root / "data" / "b.bin").write_bytes(b"other bytes")
+    (root / "data" / ".hidden").write_bytes(b"skipped")
+    return root / "data"
+
+
+def _cas_keys(s3):
+    return sorted(obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET, Prefix=f"{CAS_PREFIX}/").get("Contents", []))
+
+
+def test_sync_uploads_each_content_once(s3, tmp_path):
+    source = _sync_tree(tmp_path)
+    uploader = FileUpload(BUCKET, s3_client=s3)
+    cache_path, manifest_path = str(tmp_path / "hashes.json"), str(tmp_path / "manifest.json")
+
+    manifest = uploader.sync(str(source), cache_path=cache_path, manifest_path=manifest_path)
+    same = hashlib.sha256(b"same bytes" * 1000).hexdigest()
+    other = hashlib.sha256(b"other bytes").hexdigest()
+    assert _cas_keys(s3) == sorted([f"{CAS_PREFIX}/{same}", f"{CAS_PREFIX}/{other}"])
+
+    entries = {e["path"]: e for e in manifest["files"]}
+    assert sorted(entries) == ["a.bin", "b.bin", "sub/copy.bin"]
+    assert entries["a.bin"]["key"] == entries["sub/copy.bin"]["key"] == f"{CAS_PREFIX}/{same}"
+    assert [entries[p]["uploaded"] for p in ("a.bin", "b.bin", "sub/copy.bin")] == [True, True, False]
+    assert entries["b.bin"] == {"path": "b.bin", "size": 11, "sha256": other, "key": f"{CAS_PREFIX}/{other}", "uploaded": True}
+    assert manifest["bucket"] == BUCKET and manifest["source"] == os.path.abspath(source)
+    with open(manifest_path, encoding="utf-8") as f:
+        assert json.load(f) == manifest
+    remote = s3.list_objects_v2(Bucket=BUCKET, Prefix=f"{MANIFEST_PREFIX}/")["Contents"]
+    assert json.loads(s3.get_object(Bucket=BUCKET, Key=remote[0]["Key"])["Body"].read()) == manifest
+    assert s3.head_object(Bucket=BUCKET, Key=f"{CAS_PREFIX}/{other}")["Metadata"] == {"sha256": other}
+
+    # unchanged tree: nothing uploaded, a second manifest recorded
+    manifest = uploader.sync(str(source), cache_path=cache_path, manifest_path=manifest_path)
+    assert not any(e["uploaded"] for e in manifest["files"])
+    assert len(_cas_keys(s3)) == 2
+    assert len(s3.list_objects_v2(Bucket=BUCKET, Prefix=f"{MANIFEST_PREFIX}/")["Contents"]) == 2
+
+
+def test_hash_cache_after_touch(s3, tmp_path):
+    source = _sync_tree(tmp_path)
+    cache_path = str(tmp_path / "hashes.json")
+    uploader = FileUpload(BUCKET, s3_client=s3)
+    uploader.sync(str(source), cache_path=cache_path, manifest_path=str(tmp_path / "manifest.json"))
+
+    touched = source / "b.bin"
+    stat = touched.stat()
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))  # mtime only, same bytes
+
+    cache = HashCache(cache_path)
+    assert cache.digest(str(source / "a.bin"))[1] is True      # untouched: served from the cache
+    sha, cached = cache.digest(str(touched))
+    assert cached is False and sha == hashlib.sha256(b"other bytes").hexdigest()  # rehashed, same content
+    cache.save()
+    assert HashCache(cache_path).digest(str(touched)) == (sha, True)  # new stamp persisted
+
+    put_calls = []
+    s3.meta.events.register("before-call.s3.PutObject", lambda **kw: put_calls.append(kw))
+    manifest = uploader.sync(str(source), cache_path=cache_path, manifest_path=str(tmp_path / "manifest.json"))
+    assert not any(e["uploaded"] for e in manifest["files"])  # same CAS key, nothing re-sent
+    assert len(put_calls) == 1  # only the manifest
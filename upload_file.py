@@ -1,19 +1,182 @@
 import boto3
+from botocore.exceptions import ClientError
 from datetime import datetime
+import hashlib
+import json
 import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from create_config import read_config
 
-class FileUpload:
-    def __init__(self, bucket_name):
-        self.s3_client = boto3.client('s3')
+S3_FOLDER = "Steven"
+PART_SIZE = 8 * 1024 * 1024     # S3 needs >= 5 MiB for every part except the last
+UPLOAD_WORKERS = 4              # parts uploaded concurrently
+CAS_PREFIX = f"{S3_FOLDER}/cas"              # sync uploads each distinct content once, under its sha256
+MANIFEST_PREFIX = f"{S3_FOLDER}/manifests"
+HASH_CACHE_FILE = ".upload_hash_cache.json"  # sha256 per local path, valid while size and mtime match
+SYNC_WORKERS = 8                # files hashed / checked / uploaded concurrently by sync()
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class MultipartUploadSink:
+    """
+    Writable file object that streams its bytes to S3 as a multipart upload.
+    Full parts are uploaded in background threads while the caller keeps writing;
+    close() completes the upload and abort() (or an exception inside a with block)
+    cancels it so no orphaned parts are left in the bucket.
+    """
+    def __init__(self, bucket_name, s3_key, s3_client=None, part_size=PART_SIZE, max_workers=UPLOAD_WORKERS):
+        self.s3_client = s3_client or boto3.client('s3')
         self.bucket_name = bucket_name
-    
-    def upload_parquet(self, file_path):
+        self.s3_key = s3_key
+        self.part_size = part_size
+        self.closed = False
 
-        if not os.path.exists(file_path):
-            print(f"File not found: {file_path}")
+        response = self.s3_client.create_multipart_upload(Bucket=bucket_name, Key=s3_key)
+        self.upload_id = response["UploadId"]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._in_flight = threading.BoundedSemaphore(max_workers * 2)  # caps buffered part memory
+        self._futures = []
+        self._buffer = bytearray()
+        self._position = 0
+
+    # ---- file object interface used by pyarrow ----
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed MultipartUploadSink")
+        data = memoryview(data).cast("B")
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._submit(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    # ---- upload handling ----
+    def _submit(self, body):
+        for future in self._futures:
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+        self._in_flight.acquire()
+        part_number = len(self._futures) + 1
+        self._futures.append(self._executor.submit(self._upload_part, part_number, body))
+
+    def _upload_part(self, part_number, body):
+        try:
+            response = self.s3_client.upload_part(
+                Bucket=self.bucket_name, Key=self.s3_key, UploadId=self.upload_id,
+                PartNumber=part_number, Body=body,
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            self._in_flight.release()
+
+    def close(self):
+        if self.closed:
             return
+        try:
+            if self._buffer or not self._futures:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            parts = [future.result() for future in self._futures]
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=self.s3_key, UploadId=self.upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            self.abort()
+            raise
+        self.closed = True
+        self._executor.shutdown()
+        print(f"Uploaded successfully to: s3://{self.bucket_name}/{self.s3_key}")
+
+    def abort(self):
+        self.closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._buffer.clear()
+        self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=self.s3_key, UploadId=self.upload_id)
+        print(f"Upload aborted: s3://{self.bucket_name}/{self.s3_key}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif not self.closed:
+            self.abort()
+
+
+# ------------------ Content-addressed sync ------------------
+class HashCache:
+    """sha256 digests keyed by path, valid while the file's size and mtime are unchanged."""
+    def __init__(self, path=HASH_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    @staticmethod
+    def _stamp(stat):
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def digest(self, file_path):
+        """sha256 of file_path, read from disk only when the cached stamp is stale."""
+        key = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        entry = self._entries.get(key)
+        if entry and entry["stamp"] == self._stamp(stat):
+            return entry["sha256"], True
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while block := f.read(HASH_BLOCK_SIZE):
+                sha.update(block)  # hashlib releases the GIL, so threads hash in parallel
+        with self._lock:
+            self._entries[key] = {"stamp": self._stamp(stat), "sha256": sha.hexdigest()}
+            self._dirty = True
+        return sha.hexdigest(), False
 
+    def save(self):
+        if self.path and self._dirty:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+
+
+def list_local_files(source):
+    """(root, [relative paths]) for a file or every non-hidden file under a directory."""
+    if os.path.isfile(source):
+        return os.path.dirname(source) or ".", [os.path.basename(source)]
+    files = []
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            if not name.startswith("."):
+                files.append(os.path.relpath(os.path.join(dirpath, name), source))
+    return source, files
+
+
+class FileUpload:
+    def __init__(self, bucket_name, s3_client=None):
+        self.s3_client = s3_client or boto3.client('s3')
+        self.bucket_name = bucket_name
+
+    def build_s3_key(self, file_path):
         #Extract filename and extension
         base_name = os.path.basename(file_path)
         name, ext = os.path.splitext(base_name)
@@ -23,8 +186,19 @@ class FileUpload:
         file_with_timestamp = f"{name}_{timestamp}{ext}"
 
         # S3 folder and key
-        folder_name = "Steven"
-        s3_key = f"{folder_name}/{file_with_timestamp}"
+        return f"{S3_FOLDER}/{file_with_timestamp}"
+
+    def open_stream(self, file_path, **kwargs):
+        """Multipart sink for a file that is still being produced (no local copy)."""
+        return MultipartUploadSink(self.bucket_name, self.build_s3_key(file_path), s3_client=self.s3_client, **kwargs)
+    
+    def upload_parquet(self, file_path):
+
+        if not os.path.exists(file_path):
+            print(f"File not found: {file_path}")
+            return
+
+        s3_key = self.build_s3_key(file_path)
 
         try:
             # Upload file to S3
@@ -33,10 +207,82 @@ class FileUpload:
         except Exception as e:
             print(f"Upload failed: {e}")
 
+    def _exists(self, s3_key):
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def sync(self, source, workers=SYNC_WORKERS, cache_path=HASH_CACHE_FILE, manifest_path=None):
+        """
+        Upload a file or directory by content: each file goes to CAS_PREFIX/<sha256> and
+        is skipped when that key already exists, so reruns only upload new or changed
+        bytes. Hashes come from a local cache while size and mtime are unchanged.
+        A manifest mapping every path to its key is written locally (manifest_path,
+        default .sync_manifest.json) and to MANIFEST_PREFIX/<timestamp>.json. Returns the manifest.
+        """
+        root, files = list_local_files(source)
+        cache = HashCache(cache_path)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")  # unique per run, so manifests never overwrite
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            digests = list(pool.map(lambda rel: cache.digest(os.path.join(root, rel)), files))
+            cache.save()
+
+            # one existence check and at most one upload per distinct content
+            first_path = {}
+            for rel, (sha, _) in zip(files, digests):
+                first_path.setdefault(sha, rel)
+            keys = {sha: f"{CAS_PREFIX}/{sha}" for sha in first_path}
+            present = dict(zip(keys, pool.map(self._exists, keys.values())))
+            missing = [sha for sha in keys if not present[sha]]
+
+            def upload(sha):
+                self.s3_client.upload_file(os.path.join(root, first_path[sha]), self.bucket_name, keys[sha],
+                                           ExtraArgs={"Metadata": {"sha256": sha}})
+            list(pool.map(upload, missing))
+
+        uploaded = set(missing)
+        entries = []
+        for rel, (sha, cached) in zip(files, digests):
+            entries.append({
+                "path": rel.replace(os.sep, "/"),
+                "size": os.path.getsize(os.path.join(root, rel)),
+                "sha256": sha,
+                "key": keys[sha],
+                "uploaded": sha in uploaded and first_path[sha] == rel,
+            })
+        manifest = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "source": os.path.abspath(source),
+            "bucket": self.bucket_name,
+            "files": entries,
+        }
+        body = json.dumps(manifest, indent=2)
+        manifest_path = manifest_path or ".sync_manifest.json"  # hidden, so a later sync of . skips it
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            f.write(body)
+        manifest_key = f"{MANIFEST_PREFIX}/{timestamp}.json"
+        self.s3_client.put_object(Bucket=self.bucket_name, Key=manifest_key, Body=body.encode(),
+                                  ContentType="application/json")
+
+        sent = [e["size"] for e in entries if e["uploaded"]]
+        print(f"Synced {len(entries)} files to s3://{self.bucket_name}/{CAS_PREFIX}: "
+              f"{len(sent)} uploaded ({sum(sent) / 1e6:,.1f} MB), {len(entries) - len(sent)} already present; "
+              f"manifest {manifest_path} and s3://{self.bucket_name}/{manifest_key}")
+        return manifest
+
 
 
 def main():
     config_data = read_config()
+    if len(sys.argv) > 2 and sys.argv[1] == "sync":
+        # python upload_file.py sync <file or directory>
+        FileUpload(config_data['S3']['bucket_name']).sync(sys.argv[2])
+        return
     BUCKET_NAME = config_data['Aws']['bucket_name']
     FILE_PATH = r'C:\Users\ZML-WIN-StevenD-01\Desktop\Project1_1\employee1.parquet'
     